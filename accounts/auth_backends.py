@@ -1,18 +1,57 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.functions import Lower
 from accounts.models import CustomUser
 
+
+def unknown_identifier_key(identifier):
+    digest = hashlib.sha256(identifier.strip().lower().encode()).hexdigest()
+    return f"auth:unknown:{digest}"
+
+
 class EmailOrWalletBackend(ModelBackend):
+    """
+    Authenticates by wallet address or email in one indexed query.
+
+    Identifiers that matched no user are remembered for
+    ``AUTH_UNKNOWN_IDENTIFIER_TTL`` seconds so repeated attempts skip the
+    database. Every miss still runs the password hasher once, so a miss
+    takes as long as a wrong password for a real account.
+    """
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = CustomUser.objects.get(
-                wallet_address=username
-            )
-        except CustomUser.DoesNotExist:
-            try:
-                user = CustomUser.objects.get(email=username)
-            except CustomUser.DoesNotExist:
-                return None
+        if username is None:
+            username = kwargs.get(CustomUser.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+
+        identifier = username.strip().lower()
+        key = unknown_identifier_key(identifier)
+        if cache.get(key):
+            CustomUser().set_password(password)
+            return None
 
+        # Wallets are stored lowercased; email is matched via the Lower(email) index
+        matches = list(
+            CustomUser.objects.alias(email_ci=Lower('email'))
+            .filter(Q(wallet_address=identifier) | Q(email_ci=identifier))[:2]
+        )
+        if not matches:
+            cache.set(key, True, settings.AUTH_UNKNOWN_IDENTIFIER_TTL)
+            CustomUser().set_password(password)
+            return None
+
+        # A wallet match wins if the identifier is also someone's email
+        user = next((u for u in matches if u.wallet_address == identifier), matches[0])
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        # ModelBackend has its own async lookup; keep both paths on the same query
+        return await sync_to_async(self.authenticate)(request, username, password, **kwargs)
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import CustomUser, TokenClaimsUser
+from .tokens import USER_CLAIMS
+
+
+class VerifiedCredentialCache:
+    """
+    Thread-safe LRU of recently verified Basic credentials.
+
+    Keys are keyed HMACs of (identifier, password), never the password
+    itself. Each entry records the user's pk and a stamp of their password
+    hash and ``is_active`` flag; a changed stamp invalidates the entry.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[:2]
+
+    def set(self, key, user_pk, stamp):
+        with self._lock:
+            self._entries[key] = (user_pk, stamp, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def credential_key(userid, password):
+    return salted_hmac("accounts.basic-auth", f"{userid.strip().lower()}\0{password}", algorithm="sha256").hexdigest()
+
+
+def user_stamp(user):
+    return salted_hmac("accounts.basic-auth.stamp", f"{user.password}\0{user.is_active}", algorithm="sha256").hexdigest()
+
+
+verified_credentials = VerifiedCredentialCache(
+    maxsize=settings.BASIC_AUTH_CACHE_SIZE,
+    ttl=settings.BASIC_AUTH_CACHE_TTL,
+)
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that skips the password hasher for credentials it
+    verified recently. A hit still loads the user by primary key and checks
+    its stamp, so a password change or deactivation takes effect on the next
+    request in every process.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = credential_key(userid, password)
+        cached = verified_credentials.get(key)
+        if cached is not None:
+            user_pk, stamp = cached
+            user = CustomUser.objects.filter(pk=user_pk).first()
+            if user is not None and constant_time_compare(user_stamp(user), stamp):
+                return (user, None)
+            verified_credentials.discard(key)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        verified_credentials.set(key, user.pk, user_stamp(user))
+        return (user, auth)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that builds ``request.user`` from token claims.
+
+    The user is a ``TokenClaimsUser`` holding only the claimed fields, so
+    ORM filters and FK assignments work as usual and no query runs until a
+    view reads some other field. Like any stateless token, a deactivated
+    or demoted user keeps access until the access token expires; claims are
+    only ever put on access tokens, so a refresh re-reads them. Tokens
+    without the claims fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        claims = {jwt_settings.USER_ID_FIELD: jwt_settings.USER_ID_CLAIM}
+        claims.update({claim: claim for claim in USER_CLAIMS})
+        if any(claim not in validated_token for claim in claims.values()):
+            return super().get_user(validated_token)
+
+        # from_db() expects values in the model's field order
+        field_names, values = [], []
+        for field in TokenClaimsUser._meta.concrete_fields:
+            if field.attname in claims:
+                field_names.append(field.attname)
+                values.append(validated_token[claims[field.attname]])
+        return TokenClaimsUser.from_db(router.db_for_read(TokenClaimsUser), field_names, values)
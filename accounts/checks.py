@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Each process keeps its own entries, so a nonce consumed in one is unknown to the rest
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def check_nonce_cache(app_configs, **kwargs):
+    """
+    Stateless wallet nonces are single-use only as far as the cache
+    remembers them. Outside DEBUG that cache must be shared, or a signed
+    nonce can be replayed against another process until it expires.
+    """
+    if settings.DEBUG or settings.WALLET_NONCE_MODE != 'stateless':
+        return []
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in PER_PROCESS_CACHES:
+        return [Error(
+            f"WALLET_NONCE_MODE 'stateless' needs a shared cache, but the default cache is {backend}.",
+            hint="Point CACHES['default'] at the database, Redis or Memcached, or set WALLET_NONCE_MODE=database.",
+            id='accounts.E001',
+        )]
+    return []
@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from accounts.nonces import build_message, issue_nonce
+from accounts.signatures import SignatureVerifier, recover_address
+
+
+class Command(BaseCommand):
+    help = "Measures wallet sign-in signature recovery throughput (recoveries/s), inline vs. the batched process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000, help="Signatures to recover per run")
+        parser.add_argument('--concurrency', type=int, default=64, help="Concurrent callers submitting to the pool")
+        parser.add_argument('--workers', type=int, default=None, help="Pool processes (defaults to WALLET_SIGNATURE_WORKERS)")
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
+        count = options['count']
+        workers = options['workers'] if options['workers'] is not None else settings.WALLET_SIGNATURE_WORKERS
+        batch_size = options['batch_size'] or settings.WALLET_SIGNATURE_BATCH_SIZE
+
+        self.stdout.write(f"Signing {count} messages...")
+        samples = []
+        for _ in range(count):
+            account = Account.create()
+            message = build_message(issue_nonce(account.address))
+            signed = Account.sign_message(encode_defunct(text=message), account.key)
+            samples.append((message, signed.signature.hex(), account.address))
+
+        start = time.perf_counter()
+        for message, signature, _ in samples:
+            recover_address(message, signature)
+        inline = count / (time.perf_counter() - start)
+        self.stdout.write(f"inline:  {inline:,.0f} recoveries/s (1 thread)")
+
+        if not workers:
+            self.stdout.write("WALLET_SIGNATURE_WORKERS is 0; skipping pool run.")
+            return
+
+        verifier = SignatureVerifier(
+            workers=workers,
+            batch_size=batch_size,
+            batch_window=settings.WALLET_SIGNATURE_BATCH_WINDOW_MS / 1000,
+        )
+        try:
+            # Warm the pool so process spawn time is not counted
+            verifier.recover(*samples[0][:2])
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as callers:
+                recovered = list(callers.map(lambda s: verifier.recover(s[0], s[1]), samples))
+            pooled = count / (time.perf_counter() - start)
+        finally:
+            verifier.shutdown()
+
+        mismatches = sum(1 for got, (_, _, expected) in zip(recovered, samples) if got != expected)
+        self.stdout.write(
+            f"pooled:  {pooled:,.0f} recoveries/s ({workers} processes, batch {batch_size}, "
+            f"{options['concurrency']} callers) -> {pooled / inline:.1f}x"
+        )
+        if mismatches:
+            self.stderr.write(self.style.ERROR(f"{mismatches} recoveries returned the wrong address"))
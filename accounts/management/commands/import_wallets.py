@@ -0,0 +1,59 @@
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Bulk-registers wallets (and optional emails) from a CSV or NDJSON file, or '-' for stdin."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV with a wallet_address (or wallet) column, or NDJSON objects; '-' reads stdin")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension, else csv")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if Path(path).suffix in ('.ndjson', '.jsonl') else 'csv')
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+
+        with stream:
+            rows = self._read_ndjson(stream) if fmt == 'ndjson' else self._read_csv(stream)
+            start = time.perf_counter()
+            stats = CustomUser.objects.bulk_create_wallets(rows, batch_size=options['batch_size'])
+            elapsed = time.perf_counter() - start
+
+        rate = stats['read'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {stats['read']} rows in {elapsed:.2f}s ({rate:,.0f} rows/s): "
+            f"{stats['submitted']} submitted, {stats['existing']} already registered, {stats['invalid']} invalid or duplicate"
+        ))
+
+    def _read_csv(self, stream):
+        for row in csv.DictReader(stream):
+            yield {
+                'wallet_address': row.get('wallet_address') or row.get('wallet'),
+                'email': row.get('email'),
+            }
+
+    def _read_ndjson(self, stream):
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                raise CommandError(f"Line {number} is not valid JSON")
+            yield {
+                'wallet_address': row.get('wallet_address') or row.get('wallet'),
+                'email': row.get('email'),
+            }
@@ -1,10 +1,17 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
+from django.core.cache import cache
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.utils.text import slugify
+from itertools import islice
 import uuid
 
 
+def _username_candidate(wallet_address):
+    return f"{slugify(wallet_address)[:20]}-{uuid.uuid4().hex[:6]}"
+
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, wallet_address=None, email=None, password=None, username=None, **extra_fields):
         if not wallet_address:
@@ -13,14 +20,7 @@ class CustomUserManager(BaseUserManager):
         wallet_address = wallet_address.lower()
 
         if not username:
-            base_username = slugify(wallet_address)[:20]
-            for _ in range(5):  # Retry to ensure uniqueness
-                candidate = f"{base_username}-{uuid.uuid4().hex[:6]}"
-                if not CustomUser.objects.filter(username=candidate).exists():
-                    username = candidate
-                    break
-            else:
-                raise ValueError("Could not generate a unique username")
+            username = self.allocate_usernames([wallet_address])[wallet_address]
 
         user = self.model(
             wallet_address=wallet_address,
@@ -32,6 +32,95 @@ class CustomUserManager(BaseUserManager):
         user.save()
         return user
 
+    def allocate_usernames(self, wallet_addresses, attempts=5):
+        """
+        Returns {wallet_address: username} with usernames free at query time.
+
+        Candidates for the whole set are checked with one ``username__in``
+        query per round; only collisions are regenerated. ``wallet_addresses``
+        must already be lowercased.
+        """
+        allocated = {}
+        pending = set(wallet_addresses)
+        for _ in range(attempts):
+            if not pending:
+                return allocated
+            candidates = {}
+            for wallet in pending:
+                candidate = _username_candidate(wallet)
+                if candidate not in candidates:
+                    candidates[candidate] = wallet
+            taken = set(self.filter(username__in=candidates).values_list('username', flat=True))
+            for candidate, wallet in candidates.items():
+                if candidate not in taken:
+                    allocated[wallet] = candidate
+                    pending.discard(wallet)
+        if pending:
+            raise ValueError("Could not generate a unique username")
+        return allocated
+
+    def bulk_create_wallets(self, rows, batch_size=1000):
+        """
+        Inserts wallet users from an iterable of {'wallet_address', 'email'}
+        dicts, ``batch_size`` rows at a time.
+
+        Per batch, one query finds both already-registered wallets and taken
+        username candidates, then ``bulk_create(ignore_conflicts=True)``
+        inserts the rest. Users get unusable passwords, like wallet sign-in.
+        Returns counts of rows read, submitted, skipped as already registered
+        and skipped as invalid.
+        """
+        from .auth_backends import unknown_identifier_key
+
+        stats = {'read': 0, 'submitted': 0, 'existing': 0, 'invalid': 0}
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return stats
+            stats['read'] += len(batch)
+
+            emails = {}
+            for row in batch:
+                wallet = (row.get('wallet_address') or '').strip().lower()
+                if not wallet or wallet in emails:
+                    stats['invalid'] += 1
+                    continue
+                email = (row.get('email') or '').strip()
+                emails[wallet] = self.normalize_email(email) if email else None
+
+            candidates = {wallet: _username_candidate(wallet) for wallet in emails}
+            found = self.filter(
+                models.Q(wallet_address__in=emails) | models.Q(username__in=candidates.values())
+            ).values_list('wallet_address', 'username')
+            registered, taken = set(), set()
+            for wallet, username in found:
+                registered.add(wallet)
+                taken.add(username)
+
+            new_wallets = [wallet for wallet in emails if wallet not in registered]
+            stats['existing'] += len(emails) - len(new_wallets)
+            seen = set()
+            collided = []
+            for wallet in new_wallets:
+                if candidates[wallet] in taken or candidates[wallet] in seen:
+                    collided.append(wallet)
+                seen.add(candidates[wallet])
+            if collided:
+                candidates.update(self.allocate_usernames(collided))
+
+            users = []
+            for wallet in new_wallets:
+                user = self.model(wallet_address=wallet, email=emails[wallet], username=candidates[wallet])
+                user.set_unusable_password()
+                users.append(user)
+            self.bulk_create(users, ignore_conflicts=True)
+            stats['submitted'] += len(users)
+
+            # bulk_create skips post_save, so clear cached login misses here
+            identifiers = [u.wallet_address for u in users] + [u.email for u in users if u.email]
+            cache.delete_many([unknown_identifier_key(i) for i in identifiers])
+
     def create_superuser(self, email, password=None, **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
@@ -74,6 +163,12 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta:
+        indexes = [
+            # Case-insensitive email login (see EmailOrWalletBackend)
+            models.Index(Lower('email'), name='accounts_user_email_ci_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if self.wallet_address:
             self.wallet_address = self.wallet_address.lower()
@@ -84,3 +179,22 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     def get_username(self):
         return self.username
+
+
+class TokenClaimsUser(CustomUser):
+    """
+    A CustomUser hydrated from JWT claims without a query.
+
+    Only the fields carried in the token are loaded; touching any other
+    field fetches the rest of the row in one query. See
+    ``accounts.authentication.ClaimsJWTAuthentication``.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
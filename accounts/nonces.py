@@ -0,0 +1,68 @@
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import get_random_string
+
+NONCE_MESSAGE_PREFIX = "Sign this message to login: "
+
+_SALT = "accounts.wallet-nonce"
+_CONSUMED_KEY = "wallet-nonce:consumed:{}"
+
+
+class NonceError(Exception):
+    """Raised when a stateless wallet nonce cannot be accepted."""
+
+
+class NonceExpired(NonceError):
+    pass
+
+
+def _signer(wallet_address):
+    # Binding the wallet into the salt means a nonce issued for one wallet
+    # never verifies for another, without putting the address in the token.
+    return signing.TimestampSigner(salt=f"{_SALT}:{wallet_address.lower()}")
+
+
+def build_message(nonce):
+    return f"{NONCE_MESSAGE_PREFIX}{nonce}"
+
+
+def issue_nonce(wallet_address):
+    """
+    Returns a signed, time-stamped nonce for ``wallet_address``.
+    Nothing is stored; the signature and timestamp carry all the state.
+    """
+    return _signer(wallet_address).sign(get_random_string(24))
+
+
+def validate_nonce(wallet_address, message):
+    """
+    Checks the HMAC and age of the nonce embedded in ``message`` and returns it.
+    This is cheap, so callers should run it before any signature recovery.
+    """
+    if not message.startswith(NONCE_MESSAGE_PREFIX):
+        raise NonceError("Nonce mismatch or invalid message")
+
+    nonce = message[len(NONCE_MESSAGE_PREFIX):]
+    try:
+        _signer(wallet_address).unsign(nonce, max_age=settings.WALLET_NONCE_TTL)
+    except signing.SignatureExpired:
+        raise NonceExpired("Nonce expired. Please request a new one.")
+    except signing.BadSignature:
+        raise NonceError("Nonce mismatch or invalid message")
+    return nonce
+
+
+def consume_nonce(nonce):
+    """
+    Records ``nonce`` as used, raising ``NonceError`` if it already was.
+
+    Entries only need to outlive the nonce itself, so they share its TTL.
+    Replay protection spans processes only when ``CACHES['default']`` is a
+    shared backend (Redis, Memcached, database).
+    """
+    key = _CONSUMED_KEY.format(hashlib.sha256(nonce.encode()).hexdigest())
+    if not cache.add(key, True, timeout=settings.WALLET_NONCE_TTL):
+        raise NonceError("Nonce already used. Please request a new one.")
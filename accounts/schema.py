@@ -0,0 +1,10 @@
+from drf_spectacular.authentication import BasicScheme
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = 'accounts.authentication.ClaimsJWTAuthentication'
+
+
+class CachedBasicScheme(BasicScheme):
+    target_class = 'accounts.authentication.CachedBasicAuthentication'
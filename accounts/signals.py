@@ -0,0 +1,13 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .auth_backends import unknown_identifier_key
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+def forget_unknown_identifiers(sender, instance, **kwargs):
+    # A new account (or changed email) must be able to log in immediately
+    identifiers = [instance.wallet_address, instance.email]
+    cache.delete_many([unknown_identifier_key(i) for i in identifiers if i])
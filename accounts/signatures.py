@@ -0,0 +1,179 @@
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.conf import settings
+
+from core import lazy
+
+
+class SignatureError(Exception):
+    """Raised when a signature cannot be recovered to an address."""
+
+
+class SignatureTimeout(SignatureError):
+    """Raised when the pool did not answer in time; the signature may be fine."""
+
+
+def recover_address(message, signature):
+    """Recovers the signer of an EIP-191 personal_sign ``message``."""
+    encoded = lazy.encode_defunct()(text=message)
+    return lazy.eth_account().recover_message(encoded, signature=signature)
+
+
+def _recover_batch(items):
+    # Runs inside a pool process; errors are returned per item so one bad
+    # signature does not fail the whole batch.
+    results = []
+    for message, signature in items:
+        try:
+            results.append((True, recover_address(message, signature)))
+        except Exception as e:
+            results.append((False, str(e)))
+    return results
+
+
+class SignatureVerifier:
+    """
+    Offloads secp256k1/keccak recovery to a process pool.
+
+    Callers submit (message, signature) pairs from any thread. A collector
+    thread groups submissions that arrive within ``batch_window`` seconds (up
+    to ``batch_size``) into one pool task, so a sign-in spike costs one IPC
+    round trip per batch rather than per login. With ``workers=0`` recovery
+    runs inline in the calling thread.
+    """
+
+    def __init__(self, workers, batch_size=32, batch_window=0.002):
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self._queue = queue.SimpleQueue()
+        self._pool = None
+        self._collector = None
+        self._lock = threading.Lock()
+
+    def submit(self, message, signature):
+        """Returns a ``concurrent.futures.Future`` resolving to the address."""
+        future = Future()
+        if not self.workers:
+            try:
+                future.set_result(recover_address(message, signature))
+            except Exception as e:
+                future.set_exception(SignatureError(str(e)))
+            return future
+
+        self._ensure_started()
+        self._queue.put((message, signature, future))
+        return future
+
+    def recover(self, message, signature, timeout=None):
+        try:
+            return self.submit(message, signature).result(timeout)
+        except FutureTimeout:
+            raise SignatureTimeout("Signature verification timed out")
+
+    def shutdown(self):
+        """
+        Stops the pool. The collector keeps running, so a later submission
+        starts a new pool instead of failing.
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _ensure_started(self):
+        if self._collector is not None:
+            return
+        with self._lock:
+            if self._collector is None:
+                self._pool = self._new_pool()
+                self._collector = threading.Thread(
+                    target=self._collect, name="signature-verifier", daemon=True
+                )
+                self._collector.start()
+
+    def _new_pool(self):
+        # spawn, not fork: the parent is a threaded web worker
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        items = [(message, signature) for message, signature, _ in batch]
+        try:
+            task = self._submit(items)
+        except (BrokenProcessPool, RuntimeError):
+            # Broken or shut down; a fresh pool gets one more try
+            with self._lock:
+                self._pool = None
+            try:
+                task = self._submit(items)
+            except Exception as e:
+                # Fail this batch but keep the collector alive for the next one
+                for _, _, future in batch:
+                    future.set_exception(SignatureError(str(e)))
+                return
+        task.add_done_callback(partial(self._resolve, batch))
+
+    def _submit(self, items):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._new_pool()
+            pool = self._pool
+        return pool.submit(_recover_batch, items)
+
+    @staticmethod
+    def _resolve(batch, task):
+        try:
+            results = task.result()
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(SignatureError(str(e)))
+            return
+
+        for (_, _, future), (ok, value) in zip(batch, results):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(SignatureError(value))
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = SignatureVerifier(
+                    workers=settings.WALLET_SIGNATURE_WORKERS,
+                    batch_size=settings.WALLET_SIGNATURE_BATCH_SIZE,
+                    batch_window=settings.WALLET_SIGNATURE_BATCH_WINDOW_MS / 1000,
+                )
+                atexit.register(_verifier.shutdown)
+    return _verifier
@@ -1,3 +1,204 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import CachedBasicAuthentication, ClaimsJWTAuthentication, verified_credentials
+from .checks import check_nonce_cache
+from bookings.models import Booking
+
+from .models import CustomUser
+from .nonces import NonceError, consume_nonce, issue_nonce
+from .serializers import UserTokenRefreshSerializer
+from .tokens import USER_CLAIMS, UserRefreshToken
+
+
+class TokenClaimsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            wallet_address="0x" + "a" * 40, username="admin", email="admin@example.com", is_staff=True
+        )
+        self.refresh = UserRefreshToken.for_user(self.user)
+
+    def authenticate(self, access):
+        auth = ClaimsJWTAuthentication()
+        return auth.get_user(auth.get_validated_token(str(access)))
+
+    def test_access_token_builds_the_user_without_a_query(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.refresh.access_token)
+        self.assertEqual((user.pk, user.username, user.is_staff), (self.user.pk, "admin", True))
+
+    def test_refresh_token_carries_no_user_claims(self):
+        self.assertFalse(any(claim in self.refresh for claim in USER_CLAIMS))
+
+    def test_demotion_shows_on_the_next_refresh(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=False)
+        serializer = UserTokenRefreshSerializer(data={'refresh': str(self.refresh)})
+        serializer.is_valid(raise_exception=True)
+        self.assertFalse(self.authenticate(serializer.validated_data['access']).is_staff)
+
+    def test_plain_refresh_falls_back_to_the_database(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_staff=False)
+        self.assertFalse(self.authenticate(RefreshToken(str(self.refresh)).access_token).is_staff)
+
+    def test_refresh_for_a_deactivated_user_is_refused(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        serializer = UserTokenRefreshSerializer(data={'refresh': str(self.refresh)})
+        with self.assertRaises(AuthenticationFailed):
+            serializer.is_valid()
+
+
+class StatelessNonceTests(TestCase):
+    def test_nonce_is_consumed_once(self):
+        nonce = issue_nonce("0x" + "b" * 40)
+        consume_nonce(nonce)
+        with self.assertRaises(NonceError):
+            consume_nonce(nonce)
+
+    @override_settings(DEBUG=False, WALLET_NONCE_MODE='stateless', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    })
+    def test_per_process_cache_is_refused_outside_debug(self):
+        self.assertEqual([error.id for error in check_nonce_cache(None)], ['accounts.E001'])
+
+    @override_settings(DEBUG=False, WALLET_NONCE_MODE='stateless', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'},
+    })
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_nonce_cache(None), [])
+
+    @override_settings(DEBUG=False, WALLET_NONCE_MODE='database', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    })
+    def test_database_mode_needs_no_shared_cache(self):
+        self.assertEqual(check_nonce_cache(None), [])
+
+
+# Per-process cache so the query counts show only the user lookup; a fast hasher
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class EmailOrWalletBackendTests(TestCase):
+    wallet = "0x" + "c" * 40
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            wallet_address=self.wallet, username="nomad", email="Nomad@Example.com", password="pass-12345"
+        )
+
+    def test_wallet_matches_in_any_case_with_one_query(self):
+        with self.assertNumQueries(1):
+            user = authenticate(username=self.wallet.upper().replace("0X", "0x"), password="pass-12345")
+        self.assertEqual(user, self.user)
+
+    def test_email_matches_in_any_case(self):
+        self.assertEqual(authenticate(username=" nomad@EXAMPLE.com", password="pass-12345"), self.user)
+
+    def test_wrong_password_and_inactive_users_are_refused(self):
+        self.assertIsNone(authenticate(username=self.wallet, password="wrong"))
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(authenticate(username=self.wallet, password="pass-12345"))
+
+    def test_unknown_identifier_is_remembered(self):
+        self.assertIsNone(authenticate(username="ghost@example.com", password="x"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(authenticate(username="GHOST@example.com", password="x"))
+
+    def test_new_account_clears_the_remembered_miss(self):
+        authenticate(username="late@example.com", password="x")
+        CustomUser.objects.create_user(
+            wallet_address="0x" + "d" * 40, username="late", email="late@example.com", password="pass-12345"
+        )
+        self.assertEqual(authenticate(username="late@example.com", password="pass-12345").username, "late")
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CachedBasicAuthenticationTests(TestCase):
+    wallet = "0x" + "f" * 40
+
+    def setUp(self):
+        verified_credentials.clear()
+        self.user = CustomUser.objects.create_user(
+            wallet_address=self.wallet, username="basic", password="pass-12345"
+        )
+        self.auth = CachedBasicAuthentication()
+
+    def login(self, password="pass-12345"):
+        return self.auth.authenticate_credentials(self.wallet, password)[0]
+
+    def test_repeat_credentials_skip_the_hasher(self):
+        self.login()
+        with mock.patch.object(CustomUser, 'check_password') as check_password:
+            self.assertEqual(self.login(), self.user)
+        check_password.assert_not_called()
+
+    def test_wrong_password_is_not_served_from_the_cache(self):
+        self.login()
+        with self.assertRaises(AuthenticationFailed):
+            self.login("wrong")
+
+    def test_password_change_invalidates_the_entry(self):
+        self.login()
+        self.user.set_password("new-pass-678")
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.login()
+        self.assertEqual(self.login("new-pass-678"), self.user)
+
+    def test_deactivation_invalidates_the_entry(self):
+        self.login()
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.login()
+
+
+class ProfileETagTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(wallet_address="0x" + "9" * 40, username="profiled")
+        self.booking = Booking.objects.create(
+            user=self.user, destination="Mombasa", start_date=date(2026, 2, 1), end_date=date(2026, 2, 3)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get('/api/auth/profile/', headers=headers)
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['bookings'][0]['destination'], "Mombasa")
+        second = self.get(first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_booking_edit_changes_the_etag(self):
+        etag = self.get()['ETag']
+        self.booking.status = 'confirmed'
+        self.booking.save()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_and_deleted_bookings_change_the_etag(self):
+        etag = self.get()['ETag']
+        other = Booking.objects.create(
+            user=self.user, destination="Malindi", start_date=date(2026, 3, 1), end_date=date(2026, 3, 2)
+        )
+        added = self.get(etag)
+        self.assertEqual(added.status_code, 200)
+        other.delete()
+        self.assertEqual(self.get(added['ETag']).status_code, 200)
+
+    def test_profile_edit_changes_the_etag(self):
+        etag = self.get()['ETag']
+        self.user.email = "profiled@example.com"
+        self.user.save()
+        self.assertEqual(self.get(etag).status_code, 200)
@@ -0,0 +1,32 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Carried in access tokens so ClaimsJWTAuthentication can build request.user
+# without a query. Never put on refresh tokens: simplejwt copies a refresh
+# token's claims into every access token minted from it, so they would
+# outlive a change to the user for the refresh token's whole lifetime.
+USER_CLAIMS = ('wallet_address', 'username', 'email', 'is_staff')
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry ``USER_CLAIMS`` as read from
+    ``user`` when the access token is minted. Set ``user`` from the
+    database before minting; without it the access token carries only the
+    user id and authentication falls back to a lookup.
+    """
+
+    user = None
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        if self.user is not None:
+            for claim in USER_CLAIMS:
+                access[claim] = getattr(self.user, claim)
+        return access
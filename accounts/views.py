@@ -1,28 +1,27 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from .models import CustomUser
+from .nonces import NonceError, NonceExpired, build_message, consume_nonce, issue_nonce, validate_nonce
 from .serializers import RegisterSerializer, LoginSerializer
+from .signatures import SignatureTimeout, get_verifier
+from .tokens import UserRefreshToken
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
-from web3 import Web3
-from eth_account.messages import encode_defunct
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.utils.http import parse_etags, quote_etag
 from django.utils.crypto import get_random_string
 from django.utils import timezone
-from django.utils.text import slugify
 from datetime import timedelta
-import uuid
+import hashlib
 
 # Swagger
 from drf_spectacular.utils import (
     extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse, OpenApiTypes
 )
 
-# Web3 connection
-w3 = Web3(Web3.HTTPProvider('https://rpc-amoy.polygon.technology'))
-
-
 # --------------------
 # Register View
 # --------------------
@@ -56,7 +55,7 @@ class RegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         return Response({
             'access': str(refresh.access_token),
             'refresh': str(refresh),
@@ -98,7 +97,7 @@ class LoginView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         return Response({
             'access': str(refresh.access_token),
             'refresh': str(refresh),
@@ -168,34 +167,54 @@ class WalletSignatureAuthView(APIView):
         if not all([wallet_address, signature, original_message]):
             return Response({"error": "Missing data"}, status=400)
 
-        try:
-            user = CustomUser.objects.get(wallet_address=wallet_address.lower())
-        except CustomUser.DoesNotExist:
-            return Response({"error": "Wallet not registered for nonce"}, status=400)
+        wallet_address = wallet_address.lower()
+
+        if settings.WALLET_NONCE_MODE == 'stateless':
+            try:
+                nonce = validate_nonce(wallet_address, original_message)
+            except NonceExpired as e:
+                return Response({"error": str(e)}, status=403)
+            except NonceError as e:
+                return Response({"error": str(e)}, status=400)
+            user = None
+        else:
+            try:
+                user = CustomUser.objects.get(wallet_address=wallet_address)
+            except CustomUser.DoesNotExist:
+                return Response({"error": "Wallet not registered for nonce"}, status=400)
 
-        expected_message = f"Sign this message to login: {user.nonce}"
-        if original_message != expected_message:
-            return Response({"error": "Nonce mismatch or invalid message"}, status=400)
+            expected_message = build_message(user.nonce)
+            if not user.nonce or original_message != expected_message:
+                return Response({"error": "Nonce mismatch or invalid message"}, status=400)
 
-        if not user.nonce_created_at or timezone.now() > user.nonce_created_at + timedelta(minutes=5):
-            return Response({"error": "Nonce expired. Please request a new one."}, status=403)
+            if not user.nonce_created_at or timezone.now() > user.nonce_created_at + timedelta(seconds=settings.WALLET_NONCE_TTL):
+                return Response({"error": "Nonce expired. Please request a new one."}, status=403)
 
         try:
-            encoded = encode_defunct(text=original_message)
-            recovered = w3.eth.account.recover_message(encoded, signature=signature)
+            # Recovery is CPU-bound; the verifier batches it onto a process pool
+            recovered = get_verifier().recover(original_message, signature, timeout=10)
+        except SignatureTimeout as e:
+            return Response({"error": str(e)}, status=503)
         except Exception as e:
             return Response({"error": f"Signature verification failed: {str(e)}"}, status=400)
 
-        if recovered.lower() != wallet_address.lower():
+        if recovered.lower() != wallet_address:
             return Response({"error": "Signature mismatch"}, status=401)
 
-        # Reset nonce after successful login
-        user.nonce = None
-        user.nonce_created_at = None
-        user.last_nonce_used = timezone.now()
-        user.save()
+        if user is None:
+            try:
+                consume_nonce(nonce)
+            except NonceError as e:
+                return Response({"error": str(e)}, status=400)
+            user = _get_or_create_wallet_user(wallet_address)
+        else:
+            # Reset nonce after successful login
+            user.nonce = None
+            user.nonce_created_at = None
+            user.last_nonce_used = timezone.now()
+            user.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         return Response({
             "access": str(refresh.access_token),
             "refresh": str(refresh),
@@ -204,6 +223,26 @@ class WalletSignatureAuthView(APIView):
         })
 
 
+def _get_or_create_wallet_user(wallet_address):
+    """
+    Only reached once a signature has verified, so unverified nonce traffic
+    never creates rows. Existing users get a single UPDATE, not a full save().
+    """
+    now = timezone.now()
+    user = CustomUser.objects.filter(wallet_address=wallet_address).first()
+    if user:
+        CustomUser.objects.filter(pk=user.pk).update(last_nonce_used=now)
+        user.last_nonce_used = now
+        return user
+
+    try:
+        with transaction.atomic():
+            return CustomUser.objects.create_user(wallet_address=wallet_address, last_nonce_used=now)
+    except IntegrityError:
+        # A concurrent sign-in for the same wallet created the row first
+        return CustomUser.objects.get(wallet_address=wallet_address)
+
+
 # --------------------
 # Nonce Generation Endpoint
 # --------------------
@@ -242,28 +281,31 @@ def get_wallet_nonce(request):
         return Response({"error": "Missing wallet address"}, status=400)
 
     wallet_address = wallet_address.lower()
+
+    # Stateless nonces are verified by signature alone, so no row is touched
+    if settings.WALLET_NONCE_MODE == 'stateless':
+        nonce = issue_nonce(wallet_address)
+        return Response({
+            "message": build_message(nonce),
+            "nonce": nonce
+        })
+
     user = CustomUser.objects.filter(wallet_address=wallet_address).first()
 
     # Create new user if doesn't exist
     if not user:
-        base_username = slugify(wallet_address)[:20]
-        for _ in range(5):
-            candidate = f"{base_username}-{uuid.uuid4().hex[:6]}"
-            if not CustomUser.objects.filter(username=candidate).exists():
-                username = candidate
-                break
-        else:
+        try:
+            user = CustomUser.objects.create_user(wallet_address=wallet_address)
+        except ValueError:
             return Response({"error": "Could not generate unique username"}, status=500)
 
-        user = CustomUser.objects.create_user(wallet_address=wallet_address, username=username)
-
     nonce = get_random_string(24)
     user.nonce = nonce
     user.nonce_created_at = timezone.now()
     user.save()
 
     return Response({
-        "message": f"Sign this message to login: {nonce}",
+        "message": build_message(nonce),
         "nonce": nonce
     })
 
@@ -301,32 +343,65 @@ def get_wallet_nonce(request):
         )
     },
     tags=["User"],
-    description="Returns authenticated user's wallet, KYC status, and bookings"
+    description=(
+        "Returns authenticated user's wallet, KYC status, and most recent bookings. "
+        "Send the returned ETag as If-None-Match to get 304 Not Modified when nothing changed."
+    )
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_profile(request):
     user = request.user
-    try:
-        kyc = user.kyc
-        kyc_data = {
-            "is_verified": kyc.is_verified,
-            "level": kyc.level,
-            "review_status": kyc.review_status
-        }
-    except:
-        kyc_data = {
-            "is_verified": False,
-            "level": None,
-            "review_status": "not_submitted"
-        }
 
-    bookings = user.bookings.all().values('destination', 'start_date', 'end_date', 'status')
+    # One query for KYC (reverse one-to-one join) and the booking aggregates
+    # that make up the version stamp. The latest updated_at moves on any
+    # booking edit, and the per-status counts change when one is deleted.
+    # Writes through QuerySet.update() must set updated_at themselves.
+    state = (
+        CustomUser.objects.filter(pk=user.pk)
+        .values('kyc__is_verified', 'kyc__level', 'kyc__review_status', 'kyc__reviewed_at')
+        .annotate(
+            last_booking_change=Max('bookings__updated_at'),
+            pending=Count('bookings', filter=Q(bookings__status='pending')),
+            confirmed=Count('bookings', filter=Q(bookings__status='confirmed')),
+            cancelled=Count('bookings', filter=Q(bookings__status='cancelled')),
+        )
+        .get()
+    )
 
-    return Response({
-        "wallet_address": user.wallet_address,
-        "username": user.username,
-        "email": user.email,
-        "kyc": kyc_data,
-        "bookings": list(bookings)
-    })
+    limit = settings.PROFILE_BOOKINGS_LIMIT
+    stamp = repr((user.pk, user.wallet_address, user.username, user.email, limit, sorted(state.items())))
+    etag = quote_etag(hashlib.sha256(stamp.encode()).hexdigest()[:32])
+
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        if state['kyc__level'] is not None:
+            kyc_data = {
+                "is_verified": state['kyc__is_verified'],
+                "level": state['kyc__level'],
+                "review_status": state['kyc__review_status']
+            }
+        else:
+            kyc_data = {
+                "is_verified": False,
+                "level": None,
+                "review_status": "not_submitted"
+            }
+
+        bookings = user.bookings.order_by('-created_at', '-id').values(
+            'destination', 'start_date', 'end_date', 'status'
+        )[:limit]
+
+        response = Response({
+            "wallet_address": user.wallet_address,
+            "username": user.username,
+            "email": user.email,
+            "kyc": kyc_data,
+            "bookings": list(bookings)
+        })
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -1,8 +1,47 @@
 from django.contrib import admin
-from .models import Booking
+from .models import (
+    Booking, BookingRollup, ChainCursor, MintJob, PinnedMetadata, SignerNonce, SoulStampOwnership,
+)
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('user', 'destination', 'start_date', 'end_date', 'status', 'created_at')
     search_fields = ('user__wallet_address', 'destination', 'status')
     list_filter = ('status', 'start_date', 'end_date')
+
+
+@admin.register(BookingRollup)
+class BookingRollupAdmin(admin.ModelAdmin):
+    list_display = ('destination', 'month', 'status', 'count')
+    search_fields = ('destination',)
+    list_filter = ('status', 'month')
+
+
+@admin.register(SignerNonce)
+class SignerNonceAdmin(admin.ModelAdmin):
+    list_display = ('address', 'next_nonce', 'confirmed_nonce', 'confirmed_changed_at', 'synced_at')
+    readonly_fields = ('confirmed_nonce', 'confirmed_changed_at', 'synced_at')
+
+
+@admin.register(MintJob)
+class MintJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'booking', 'wallet_address', 'status', 'tx_hash', 'attempts', 'created_at')
+    search_fields = ('wallet_address', 'tx_hash', 'idempotency_key')
+    list_filter = ('status',)
+
+
+@admin.register(PinnedMetadata)
+class PinnedMetadataAdmin(admin.ModelAdmin):
+    list_display = ('cid', 'pinned_at', 'created_at')
+    search_fields = ('cid',)
+
+
+@admin.register(SoulStampOwnership)
+class SoulStampOwnershipAdmin(admin.ModelAdmin):
+    list_display = ('token_id', 'owner', 'contract_address', 'block_number', 'tx_hash')
+    search_fields = ('owner', 'tx_hash')
+
+
+@admin.register(ChainCursor)
+class ChainCursorAdmin(admin.ModelAdmin):
+    list_display = ('name', 'block_number', 'updated_at')
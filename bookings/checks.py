@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCAL_BACKEND = "bookings.metadata.LocalPinningBackend"
+
+
+@register()
+def check_pinning_backend(app_configs, **kwargs):
+    """
+    Minting outside DEBUG needs a real pinning service. With the local
+    backend, token URIs would point at files only this machine has.
+    """
+    if settings.DEBUG or not settings.MINT_CONTRACT_ADDRESS:
+        return []
+    backend = settings.METADATA_PINNING_BACKEND
+    if not backend or backend == LOCAL_BACKEND:
+        return [Error(
+            "METADATA_PINNING_BACKEND must name a pinning service when minting is enabled.",
+            hint=f"Set it to bookings.metadata.PinataPinningBackend; {LOCAL_BACKEND} is for DEBUG and tests.",
+            id='bookings.E001',
+        )]
+    if backend == "bookings.metadata.PinataPinningBackend" and not settings.PINATA_JWT:
+        return [Error("PINATA_JWT is not set.", id='bookings.E002')]
+    return []
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Count
+
+from .models import Booking
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return ' '.join(text.split()).casefold()
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+def destination_counts(min_users):
+    """
+    (destination, bookings) for destinations booked by at least
+    ``min_users`` distinct users. Rarer ones are left out, so suggestions
+    can't reveal where one particular traveller is going.
+    """
+    return (
+        Booking.objects.values_list('destination')
+        .annotate(bookings=Count('id'), users=Count('user', distinct=True))
+        .filter(users__gte=min_users)
+        .values_list('destination', 'bookings')
+        .order_by()
+    )
+
+
+class DestinationIndex:
+    """
+    In-process prefix trie over booking destinations, ranked by booking count.
+
+    Every node stores its best ``max_results`` completions, computed when the
+    trie is built, so a lookup walks len(prefix) nodes and returns a list
+    that is already ranked. Only the ``max_entries`` most booked
+    destinations are indexed, which bounds the trie's memory.
+
+    The index is built from one GROUP BY over ``Booking.destination`` on a
+    background thread, first on demand and then every ``ttl`` seconds.
+    Requests keep being served from the previous trie while the new one is
+    built. Until the first build finishes, ``suggest`` returns None.
+    """
+
+    def __init__(self, ttl, max_results=10, max_entries=20000, min_users=1):
+        self.ttl = ttl
+        self.max_results = max_results
+        self.max_entries = max_entries
+        self.min_users = min_users
+        self.entries = 0
+        self.nodes = 0
+        self._root = None
+        self._built_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def build(self, counts):
+        """Builds the trie from (destination, booking_count) pairs and swaps it in."""
+        merged = {}
+        for name, count in counts:
+            key = normalize(name)
+            if not key:
+                continue
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [count, name, count]
+            else:
+                # Display the most common spelling of a destination
+                entry[0] += count
+                if count > entry[2]:
+                    entry[1], entry[2] = name, count
+
+        ranked = sorted(merged.items(), key=lambda item: -item[1][0])
+        if len(ranked) > self.max_entries:
+            logger.warning(
+                "Destination index holds the top %d of %d destinations (DESTINATION_INDEX_MAX_ENTRIES)",
+                self.max_entries, len(ranked),
+            )
+            del ranked[self.max_entries:]
+
+        root = _Node()
+        nodes = 1
+        # Inserting in descending popularity means each node's top list is
+        # just the first max_results entries that pass through it.
+        for key, (total, name, _) in ranked:
+            suggestion = (name, total)
+            node = root
+            if len(node.top) < self.max_results:
+                node.top.append(suggestion)
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                    nodes += 1
+                node = child
+                if len(node.top) < self.max_results:
+                    node.top.append(suggestion)
+
+        self._root = root
+        self.entries, self.nodes = len(ranked), nodes
+        self._built_at = time.monotonic()
+
+    def refresh(self):
+        self.build(destination_counts(self.min_users).iterator(chunk_size=5000))
+        logger.info("Destination index built: %d destinations, %d trie nodes", self.entries, self.nodes)
+
+    def suggest(self, prefix, limit=10):
+        """Ranked (destination, bookings) completions of ``prefix``, or None before the first build."""
+        self._ensure_fresh()
+        node = self._root
+        if node is None:
+            return None
+        for char in normalize(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top[:limit]
+
+    def _ensure_fresh(self):
+        if self._refreshing or (self._built_at is not None and time.monotonic() - self._built_at < self.ttl):
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name="destination-index", daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Destination index refresh failed")
+            self._built_at = time.monotonic()  # back off for one TTL
+        finally:
+            self._refreshing = False
+            connections.close_all()
+
+
+destination_index = DestinationIndex(
+    ttl=settings.DESTINATION_INDEX_TTL,
+    max_entries=settings.DESTINATION_INDEX_MAX_ENTRIES,
+    min_users=settings.DESTINATION_MIN_USERS,
+)
+
+
+def suggest_destinations(query, limit=10):
+    """
+    Ranked destination suggestions for ``query`` as (destination, bookings).
+
+    Prefix matches come from the in-process trie. Until its first build
+    finishes they come from the database instead. On Postgres, if there are
+    fewer than ``limit`` prefix matches, substring matches fill the rest.
+    Both queries are served by the pg_trgm GIN index on UPPER(destination).
+    Only destinations with DESTINATION_MIN_USERS distinct travellers appear.
+    """
+    suggestions = destination_index.suggest(query, limit)
+    if suggestions is None:
+        suggestions = destination_counts(settings.DESTINATION_MIN_USERS).filter(
+            destination__istartswith=query.strip()
+        ).order_by('-bookings')[:limit]
+    suggestions = list(suggestions)
+    if len(suggestions) >= limit or len(query.strip()) < 3 or connection.vendor != 'postgresql':
+        return suggestions
+
+    seen = {normalize(name) for name, _ in suggestions}
+    substring_matches = destination_counts(settings.DESTINATION_MIN_USERS).filter(
+        destination__icontains=query.strip()
+    ).order_by('-bookings')[:limit * 2]
+    for name, count in substring_matches:
+        if normalize(name) not in seen and len(suggestions) < limit:
+            seen.add(normalize(name))
+            suggestions.append((name, count))
+    return suggestions
@@ -0,0 +1,15 @@
+from core.exports import date_range_lookups
+
+from .models import Booking
+
+EXPORT_FIELDS = (
+    'id', 'user_id', 'user__wallet_address', 'destination',
+    'start_date', 'end_date', 'status', 'created_at',
+)
+
+
+def export_queryset(since=None, until=None, status=None, **kwargs):
+    bookings = Booking.objects.filter(**date_range_lookups('created_at', since, until))
+    if status:
+        bookings = bookings.filter(status=status)
+    return bookings.order_by('id')
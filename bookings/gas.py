@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10 ** 9
+
+
+def _size_bucket(args):
+    """
+    Coarse calldata size of ``args`` for memoizing gas estimates. Returns
+    the length of each list and the number of 32-byte words of string or
+    bytes data. This is the part of an argument that changes the gas a
+    call uses.
+    """
+    lists = tuple(len(arg) for arg in args if isinstance(arg, (list, tuple)))
+    data = 0
+    for arg in args:
+        for value in (arg if isinstance(arg, (list, tuple)) else [arg]):
+            if isinstance(value, (str, bytes)):
+                data += len(value.encode() if isinstance(value, str) else value)
+    return lists, -(-data // 32)
+
+
+class GasOracle:
+    """
+    Current fee parameters for mint transactions, without an RPC per mint.
+
+    Fees come from ``eth_feeHistory`` (EIP-1559). Chains without a base fee
+    fall back to ``eth_gasPrice``. The first read fetches synchronously.
+    After that, a read older than ``ttl`` seconds returns the cached fees
+    and starts one background refresh.
+
+    ``gas_limit`` memoizes ``estimate_gas`` per contract function and
+    argument-size bucket, padded by ``margin``. Only the first call of each
+    shape pays for an estimate.
+    """
+
+    retry_failed_after = 60
+
+    def __init__(self, w3, ttl=15, margin=1.2, percentile=50, max_fee_gwei=0, fallback_gas_price_gwei=25):
+        self.w3 = w3
+        self.ttl = ttl
+        self.margin = margin
+        self.percentile = percentile
+        self.max_fee = int(max_fee_gwei * GWEI) or None
+        self.fallback_gas_price = int(fallback_gas_price_gwei * GWEI)
+        self._fees = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._estimates = {}
+
+    def fees(self):
+        """Fee fields for a transaction dict: ``gasPrice``, or ``maxFeePerGas`` and ``maxPriorityFeePerGas``."""
+        if self._fees is None:
+            with self._lock:
+                if self._fees is None:
+                    self.refresh()
+        elif time.monotonic() - self._fetched_at >= self.ttl and not self._refreshing:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, name="gas-oracle", daemon=True).start()
+        return dict(self._fees)
+
+    def refresh(self):
+        try:
+            fees = self._fetch()
+        except Exception as e:
+            logger.warning("Gas oracle refresh failed: %s", e)
+            if self._fees is None:
+                self._fees = {"gasPrice": self.fallback_gas_price}
+        else:
+            self._fees = self._cap(fees)
+        self._fetched_at = time.monotonic()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def _fetch(self):
+        history = self.w3.eth.fee_history(5, "latest", [self.percentile])
+        base_fees = history.get("baseFeePerGas") or []
+        if not base_fees or not base_fees[-1]:
+            return {"gasPrice": self.w3.eth.gas_price}
+
+        # baseFeePerGas[-1] is the next block's base fee. Doubling it keeps
+        # the transaction includable through six full blocks of base fee rises.
+        tips = sorted(reward[0] for reward in history.get("reward") or [] if reward)
+        priority = max(tips[len(tips) // 2] if tips else 0, GWEI)
+        return {"maxFeePerGas": 2 * base_fees[-1] + priority, "maxPriorityFeePerGas": priority}
+
+    def _cap(self, fees):
+        if not self.max_fee:
+            return fees
+        return {key: min(value, self.max_fee) for key, value in fees.items()}
+
+    def gas_limit(self, function_name, args, estimate, fallback):
+        """
+        Memoized ``estimate() * margin`` for calls of ``function_name`` with
+        arguments shaped like ``args``. If estimation fails, e.g. because the
+        call would revert, ``fallback`` is used. That result is only kept for
+        ``retry_failed_after`` seconds, so a persistent revert does not cost
+        an RPC per mint.
+        """
+        key = (function_name, _size_bucket(args))
+        cached = self._estimates.get(key)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+        try:
+            gas, expires = int(estimate() * self.margin), float('inf')
+        except Exception as e:
+            logger.warning("Gas estimate for %s failed, using %s: %s", function_name, fallback, e)
+            gas, expires = fallback, time.monotonic() + self.retry_failed_after
+        self._estimates[key] = (gas, expires)
+        return gas
@@ -0,0 +1,339 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import lazy
+from core.rpc import pinned
+
+from .metadata import pin_pending
+from .minting import TransactionRejected, never_broadcast
+from .models import MintJob
+from .ownership import minted_recipients
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an Idempotency-Key is replayed with a different booking."""
+
+
+class WalletAlreadyMinting(Exception):
+    """Raised when the wallet already has a live mint job; ``job`` is that job."""
+
+    def __init__(self, job):
+        super().__init__("This wallet already has a SoulStamp mint")
+        self.job = job
+
+
+def find_mint_job(user, booking=None, idempotency_key=''):
+    """The job an earlier request with this key, or for this booking, created; else None."""
+    if idempotency_key:
+        job = MintJob.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        if job is not None:
+            if job.booking_id != (booking.pk if booking else None):
+                raise IdempotencyKeyReused("Idempotency-Key was already used for a different booking")
+            return job
+    if booking is not None:
+        return MintJob.objects.filter(user=user, booking=booking).exclude(status='failed').first()
+    return None
+
+
+def live_mint_for_wallet(wallet_address):
+    """The wallet's queued, in-flight or minted job, or None."""
+    return MintJob.objects.filter(wallet_address=wallet_address.lower()).exclude(status='failed').first()
+
+
+def enqueue_mint(user, metadata_uri, booking=None, idempotency_key='', metadata=None):
+    """
+    Queues a mint and returns ``(job, created)``. If another request with
+    the same key or booking got in first, returns its job instead; if the
+    wallet has a live job for anything else, raises ``WalletAlreadyMinting``.
+    The unique constraints decide the race, not a prior read.
+    """
+    try:
+        with transaction.atomic():
+            job = MintJob.objects.create(
+                user=user,
+                booking=booking,
+                idempotency_key=idempotency_key,
+                wallet_address=user.wallet_address,
+                metadata=metadata,
+                metadata_uri=metadata_uri,
+            )
+    except IntegrityError:
+        job = find_mint_job(user, booking, idempotency_key)
+        if job is not None:
+            return job, False
+        job = live_mint_for_wallet(user.wallet_address)
+        if job is None:
+            raise
+        raise WalletAlreadyMinting(job)
+    return job, True
+
+
+def claim_jobs(limit):
+    """
+    Moves up to ``limit`` of the oldest queued jobs to running and returns them.
+    Rows locked by another worker are skipped, not waited on.
+    """
+    with transaction.atomic():
+        ids = list(
+            MintJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        MintJob.objects.filter(id__in=ids).update(
+            status='running', attempts=F('attempts') + 1, updated_at=timezone.now()
+        )
+    return list(MintJob.objects.filter(id__in=ids).select_related('metadata').order_by('created_at', 'id'))
+
+
+def record_signed(jobs, signed):
+    """
+    Stores the nonce, hash and raw bytes of each job's transaction before
+    it is broadcast. ``signed`` is what ``MintClient.mint_many`` hands its
+    ``on_signed`` callback.
+    """
+    now = timezone.now()
+    for index, nonce, tx_hash, raw_transaction in signed:
+        job = jobs[index]
+        job.nonce, job.tx_hash = nonce, tx_hash
+        job.signed_tx = lazy.web3().to_hex(raw_transaction)
+        job.updated_at = now
+    MintJob.objects.bulk_update([jobs[index] for index, *_ in signed], ['nonce', 'tx_hash', 'signed_tx', 'updated_at'])
+
+
+def finish_job(job, tx_hash):
+    MintJob.objects.filter(pk=job.pk, status__in=['running', 'unconfirmed']).update(
+        status='submitted', tx_hash=tx_hash, error='', submitted_at=timezone.now(), updated_at=timezone.now()
+    )
+
+
+def fail_job(job, error, max_attempts):
+    """
+    Requeues ``job`` while attempts remain, otherwise marks it failed. Only
+    for failures no node can hold a transaction for (``never_broadcast``):
+    the next attempt signs a new transaction with a new nonce.
+    """
+    retry = job.attempts < max_attempts
+    MintJob.objects.filter(pk=job.pk, status__in=['running', 'unconfirmed']).update(
+        status='queued' if retry else 'failed', error=str(error)[:2000],
+        nonce=None, tx_hash='', signed_tx='', updated_at=timezone.now(),
+    )
+
+
+def hold_job(job, error):
+    """
+    Parks a job whose broadcast may have reached a node, or whose submitted
+    transaction the node no longer knows, until ``reconcile_jobs`` settles it.
+    """
+    MintJob.objects.filter(pk=job.pk, status__in=['running', 'submitted', 'unconfirmed']).update(
+        status='unconfirmed', error=str(error)[:2000], updated_at=timezone.now()
+    )
+
+
+def reconcile_jobs(client, stale_after, max_attempts):
+    """
+    Settles jobs whose broadcast outcome is unknown: ``unconfirmed`` ones,
+    and ``running`` ones a dead worker left for ``stale_after`` seconds.
+    Each is looked up on chain by the transaction stored before broadcast,
+    and only requeued once that transaction provably cannot be mined:
+
+    - nothing signed yet: nothing went out, so the job is requeued;
+    - the node knows the hash, pending or mined: submitted;
+    - unknown, with a transaction already mined at its nonce: another
+      transaction took the nonce (see ``recover_stuck_nonce``), so the job
+      is requeued;
+    - unknown otherwise: the stored bytes are broadcast again. Same nonce,
+      same hash, so this cannot mint twice.
+
+    Each job's lookups go to one pinned endpoint, so the nonce count and
+    the transaction lookup describe the same node's view of the chain.
+    Returns a dict counting each outcome.
+    """
+    from web3.exceptions import TransactionNotFound
+
+    close_old_connections()
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    jobs = MintJob.objects.filter(
+        Q(status='unconfirmed') | Q(status='running', updated_at__lt=cutoff)
+    ).order_by('created_at', 'id')
+    outcomes = {'submitted': 0, 'requeued': 0, 'rebroadcast': 0, 'waiting': 0}
+    for job in jobs:
+        if not job.signed_tx:
+            fail_job(job, "Worker stopped before signing", max_attempts)
+            outcomes['requeued'] += 1
+            continue
+        try:
+            with pinned(client.w3):
+                # The count first: a transaction mined after it was read is still found below
+                mined_nonces = client.w3.eth.get_transaction_count(client.address, 'latest')
+                try:
+                    client.w3.eth.get_transaction(job.tx_hash)
+                except TransactionNotFound:
+                    pass
+                else:
+                    finish_job(job, job.tx_hash)
+                    outcomes['submitted'] += 1
+                    continue
+                if mined_nonces > job.nonce:
+                    fail_job(job, f"Nonce {job.nonce} was used by another transaction", max_attempts)
+                    outcomes['requeued'] += 1
+                    continue
+                client.broadcast(job.signed_tx)
+        except TransactionRejected as e:
+            # Usually a fee the network no longer accepts. The nonce stays
+            # unused until recover_stuck_nonce replaces it.
+            logger.warning("Mint job %s rebroadcast rejected: %s", job.pk, e)
+            hold_job(job, e)
+            outcomes['waiting'] += 1
+        except Exception as e:
+            logger.warning("Mint job %s could not be reconciled yet: %s", job.pk, e)
+            outcomes['waiting'] += 1
+        else:
+            finish_job(job, job.tx_hash)
+            outcomes['rebroadcast'] += 1
+    close_old_connections()
+    return outcomes
+
+
+def confirm_jobs(client, confirmations):
+    """
+    Settles submitted jobs from their receipts once ``confirmations``
+    blocks deep. A job is minted only when its transaction succeeded and
+    logged a Transfer from the zero address to the job's wallet. So a
+    reverted batch transaction fails every job it carried, and a batch
+    that skipped a recipient fails that job alone. A transaction the node
+    no longer knows goes back to ``unconfirmed`` for ``reconcile_jobs``.
+    Returns (minted, failed).
+    """
+    from web3.exceptions import TransactionNotFound
+
+    close_old_connections()
+    by_tx = defaultdict(list)
+    for job in MintJob.objects.filter(status='submitted').exclude(tx_hash='').order_by('id'):
+        by_tx[job.tx_hash].append(job)
+    if not by_tx:
+        return 0, 0
+
+    minted, failed = [], []
+    # One endpoint for the head and every receipt, so depths are measured on one chain view
+    with pinned(client.w3):
+        try:
+            safe_head = client.w3.eth.block_number - confirmations
+        except Exception as e:
+            logger.warning("Cannot confirm mint jobs, head unavailable: %s", e)
+            return 0, 0
+        for tx_hash, jobs in by_tx.items():
+            try:
+                try:
+                    receipt = client.w3.eth.get_transaction_receipt(tx_hash)
+                except TransactionNotFound:
+                    try:
+                        client.w3.eth.get_transaction(tx_hash)
+                    except TransactionNotFound:
+                        for job in jobs:
+                            hold_job(job, "Transaction dropped before it was mined")
+                    continue
+            except Exception as e:
+                logger.warning("Receipt for %s not available yet: %s", tx_hash, e)
+                continue
+            if receipt['blockNumber'] > safe_head:
+                continue
+
+            recipients = minted_recipients(receipt, client.contract.address) if receipt['status'] == 1 else set()
+            for job in jobs:
+                if job.wallet_address.lower() in recipients:
+                    minted.append(job.pk)
+                else:
+                    failed.append((job.pk, "Transaction reverted" if receipt['status'] != 1
+                                   else "Transaction did not mint to this wallet"))
+
+    now = timezone.now()
+    MintJob.objects.filter(pk__in=minted, status='submitted').update(status='minted', updated_at=now)
+    for pk, error in failed:
+        MintJob.objects.filter(pk=pk, status='submitted').update(status='failed', error=error, updated_at=now)
+    close_old_connections()
+    return len(minted), len(failed)
+
+
+def claim_batch(batch_size, window):
+    """
+    Claims up to ``batch_size`` jobs. Once the first job is in hand, keeps
+    collecting for at most ``window`` seconds, so a burst of requests goes
+    out as one batch instead of many.
+    """
+    jobs = claim_jobs(batch_size)
+    deadline = time.monotonic() + window
+    while jobs and len(jobs) < batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(remaining, 0.05))
+        jobs.extend(claim_jobs(batch_size - len(jobs)))
+    return jobs
+
+
+def run_batch(client, jobs, max_attempts):
+    """
+    Mints a group of claimed jobs through ``MintClient.mint_many`` and records
+    each recipient's outcome. Metadata not yet pinned is uploaded first, as
+    one batch. Returns (submitted, transactions, seconds).
+
+    Submitted means broadcast, not minted: a batch transaction carries
+    every recipient, so one revert fails them all. ``confirm_jobs`` reads
+    the receipts and settles each job.
+    """
+    close_old_connections()
+    started = time.perf_counter()
+    try:
+        try:
+            unpinned = pin_pending([job.metadata for job in jobs])
+        except Exception as e:
+            unpinned = {job.metadata.cid: e for job in jobs if job.metadata and job.metadata.pinned_at is None}
+        if unpinned:
+            # A token must never point at metadata nobody is hosting
+            for job in [job for job in jobs if job.metadata and job.metadata.cid in unpinned]:
+                logger.warning("Mint job %s waiting on metadata pin: %s", job.pk, unpinned[job.metadata.cid])
+                fail_job(job, unpinned[job.metadata.cid], max_attempts)
+            jobs = [job for job in jobs if not (job.metadata and job.metadata.cid in unpinned)]
+        if not jobs:
+            return 0, 0, time.perf_counter() - started
+
+        try:
+            results = client.mint_many(
+                [(job.wallet_address, job.metadata_uri) for job in jobs],
+                on_signed=lambda signed: record_signed(jobs, signed),
+            )
+        except Exception as e:
+            results = [e] * len(jobs)
+
+        for job, result in zip(jobs, results):
+            if not isinstance(result, Exception):
+                finish_job(job, result)
+            elif never_broadcast(result):
+                logger.warning("Mint job %s failed (attempt %s): %s", job.pk, job.attempts, result)
+                fail_job(job, result, max_attempts)
+            else:
+                # A node may have the transaction; signing another could mint twice
+                logger.warning("Mint job %s may have been broadcast, holding it: %s", job.pk, result)
+                hold_job(job, result)
+    finally:
+        close_old_connections()
+
+    elapsed = time.perf_counter() - started
+    tx_hashes = {result for result in results if not isinstance(result, Exception)}
+    submitted = sum(1 for result in results if not isinstance(result, Exception))
+    logger.info(
+        "Submitted %s/%s recipient(s) in %s transaction(s), %.2fs",
+        submitted, len(jobs), len(tx_hashes), elapsed,
+    )
+    return submitted, len(tx_hashes), elapsed
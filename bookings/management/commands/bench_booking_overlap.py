@@ -0,0 +1,64 @@
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import CustomUser
+from bookings.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Times the indexed overlap query against a full scan for one user with many bookings. Rolls back its data."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--queries', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(wallet_address=f"bench-{uuid.uuid4().hex}")
+            rng = random.Random(42)
+            origin = date(2000, 1, 1)
+            Booking.objects.bulk_create(
+                [
+                    Booking(
+                        user=user,
+                        destination="Bench",
+                        start_date=(start := origin + timedelta(days=rng.randrange(365 * 30))),
+                        end_date=start + timedelta(days=rng.randrange(1, 21)),
+                        status=rng.choice(['pending', 'confirmed', 'cancelled']),
+                    )
+                    for _ in range(options['bookings'])
+                ],
+                batch_size=1000,
+            )
+
+            windows = []
+            for _ in range(options['queries']):
+                start = origin + timedelta(days=rng.randrange(365 * 30))
+                windows.append((start, start + timedelta(days=rng.randrange(1, 15))))
+
+            bookings = Booking.objects.filter(user=user).active()
+            self.stdout.write(bookings.overlapping(*windows[0]).explain())
+
+            started = time.perf_counter()
+            indexed = [list(bookings.overlapping(a, b).values_list('id', flat=True)) for a, b in windows]
+            indexed_ms = (time.perf_counter() - started) / len(windows) * 1000
+
+            started = time.perf_counter()
+            scanned = [
+                [pk for pk, s, e in bookings.values_list('id', 'start_date', 'end_date') if s <= b and e >= a]
+                for a, b in windows
+            ]
+            scan_ms = (time.perf_counter() - started) / len(windows) * 1000
+
+            mismatches = sum(sorted(x) != sorted(y) for x, y in zip(indexed, scanned))
+            self.stdout.write(
+                f"{options['bookings']} bookings, {len(windows)} queries: "
+                f"indexed {indexed_ms:.2f} ms/query, full scan {scan_ms:.2f} ms/query "
+                f"({scan_ms / indexed_ms:.0f}x), {mismatches} mismatches"
+            )
+            transaction.set_rollback(True)
@@ -0,0 +1,52 @@
+import random
+import string
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookings.destinations import DestinationIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the destination trie from synthetic Zipf-distributed counts, "
+        "reports its memory and times prefix lookups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destinations', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=20000)
+        parser.add_argument('--max-entries', type=int, default=settings.DESTINATION_INDEX_MAX_ENTRIES)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        names = {
+            ''.join(rng.choices(string.ascii_lowercase, k=rng.randrange(4, 14))).title()
+            for _ in range(options['destinations'])
+        }
+        counts = [(name, int(1_000_000 / rank)) for rank, name in enumerate(names, start=1)]
+        rows = sum(count for _, count in counts)
+
+        index = DestinationIndex(ttl=float('inf'), max_entries=options['max_entries'])
+        tracemalloc.start()
+        started = time.perf_counter()
+        index.build(counts)
+        elapsed = time.perf_counter() - started
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f"built {index.entries} of {len(counts)} destinations ({rows} bookings) in {elapsed:.2f}s: "
+            f"{index.nodes} nodes, {retained / 2 ** 20:.1f} MiB retained, {peak / 2 ** 20:.1f} MiB peak"
+        )
+
+        prefixes = [name[:rng.randrange(1, 5)] for name, _ in rng.choices(counts, k=options['queries'])]
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.suggest(prefix)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        for label, q in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            self.stdout.write(f"{label}: {timings[int(q * (len(timings) - 1))] * 1e6:.1f} us")
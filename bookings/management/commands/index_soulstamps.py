@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.ownership import get_indexer
+
+
+class Command(BaseCommand):
+    help = "Ingests SoulStamp Transfer logs into SoulStampOwnership, from the stored block cursor to the confirmed head."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--follow', action='store_true', help="Keep polling for new blocks")
+        parser.add_argument('--interval', type=float, default=15.0, help="Seconds between passes with --follow")
+        parser.add_argument('--from-block', type=int, help="Reset the cursor and re-ingest from this block")
+        parser.add_argument('--confirmations', type=int, default=settings.MINT_INDEX_CONFIRMATIONS)
+        parser.add_argument('--batch-blocks', type=int, default=settings.MINT_INDEX_BATCH_BLOCKS)
+
+    def handle(self, *args, **options):
+        if not (settings.RPC_ENDPOINTS and settings.MINT_CONTRACT_ADDRESS):
+            raise CommandError("RPC_ENDPOINTS (or MINT_RPC_URL) and MINT_CONTRACT_ADDRESS must be set")
+
+        indexer = get_indexer()
+        indexer.confirmations = options['confirmations']
+        indexer.batch_blocks = max(1, options['batch_blocks'])
+        if options['from_block'] is not None:
+            indexer.reset(options['from_block'])
+
+        while True:
+            started = time.perf_counter()
+            try:
+                blocks, transfers = indexer.run_once()
+            except Exception as e:
+                if not options['follow']:
+                    raise CommandError(f"Indexing failed: {e}")
+                self.stderr.write(f"Indexing failed, retrying: {e}")
+            else:
+                if blocks or not options['follow']:
+                    self.stdout.write(
+                        f"Indexed {blocks} block(s), {transfers} transfer(s) through block {indexer.cursor()} "
+                        f"in {time.perf_counter() - started:.2f}s"
+                    )
+            if not options['follow']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes BookingRollup from the Booking table. Run it after writes that bypass the Booking "
+        "signals (QuerySet.update(), bulk_create/bulk_update, raw SQL), which leave the rollups out of date. "
+        "On PostgreSQL booking writes wait until the rebuild commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} rollup rows in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.minting import MintUnavailable, get_mint_client
+from bookings.signer import recover_stuck_nonce
+
+
+class Command(BaseCommand):
+    help = "Syncs the minting signer's nonce counter with the chain and optionally replaces a stuck transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help="Move the counter back to the chain's pending count. Only safe while no mints are in flight.",
+        )
+        parser.add_argument(
+            '--unstick-after', type=int, metavar='SECONDS',
+            help="Replace the lowest outstanding nonce if it has not been mined for this long.",
+        )
+        parser.add_argument(
+            '--bump', type=float, default=1.25,
+            help="Multiplier on current fees for the replacement transaction.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            client = get_mint_client()
+            client.ensure_healthy()
+        except MintUnavailable as e:
+            raise CommandError(str(e))
+
+        row = client.nonces.resync(reset=options['reset'])
+        self.stdout.write(
+            f"{row.address}: next_nonce={row.next_nonce} confirmed={row.confirmed_nonce} "
+            f"released={row.released} synced_at={row.synced_at:%Y-%m-%d %H:%M:%S}"
+        )
+
+        if options['unstick_after'] is not None:
+            tx_hash = recover_stuck_nonce(client, min_age=options['unstick_after'], bump=options['bump'])
+            if tx_hash:
+                self.stdout.write(self.style.WARNING(f"Sent replacement for nonce {row.confirmed_nonce}: {tx_hash}"))
+            else:
+                self.stdout.write("No stuck transaction")
@@ -0,0 +1,134 @@
+import logging
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.jobs import claim_batch, confirm_jobs, reconcile_jobs, run_batch
+from bookings.minting import MintUnavailable, get_mint_client
+from bookings.signer import recover_stuck_nonce
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drains queued MintJobs in batches (collected for up to --batch-window-ms), "
+        "keeping up to --concurrency batches in flight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.MINT_WORKER_CONCURRENCY)
+        parser.add_argument('--batch-size', type=int, default=settings.MINT_BATCH_SIZE)
+        parser.add_argument('--batch-window-ms', type=int, default=settings.MINT_BATCH_WINDOW_MS)
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--max-attempts', type=int, default=settings.MINT_JOB_MAX_ATTEMPTS)
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Reconcile jobs left running this many seconds by a dead worker, and replace "
+                                 "the signer's lowest nonce once it has gone unmined this long")
+        parser.add_argument('--reconcile-every', type=int, default=30,
+                            help="Seconds between checks of unconfirmed and stale jobs against the chain")
+        parser.add_argument('--confirmations', type=int, default=settings.MINT_INDEX_CONFIRMATIONS,
+                            help="Blocks a receipt must be buried under before a job counts as minted or failed")
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty")
+
+    def handle(self, *args, **options):
+        try:
+            client = get_mint_client()
+        except MintUnavailable as e:
+            raise CommandError(str(e))
+
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        concurrency = max(1, options['concurrency'])
+        batch_size = max(1, options['batch_size'])
+        window = options['batch_window_ms'] / 1000
+        in_flight = set()
+        finished = []
+        jobs = 0
+        # Wall time with at least one batch in flight; idle polling is left out
+        busy = 0.0
+        busy_since = None
+        last_reconcile = 0.0
+
+        self.stdout.write(f"Mint worker started (concurrency={concurrency}, batch_size={batch_size})")
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='mint') as pool:
+            try:
+                while True:
+                    if time.monotonic() - last_reconcile > options['reconcile_every']:
+                        outcomes = reconcile_jobs(client, options['stale_after'], options['max_attempts'])
+                        if any(outcomes.values()):
+                            self.stdout.write(self.style.WARNING(
+                                "Reconciled jobs: " + ", ".join(f"{count} {name}" for name, count in outcomes.items())
+                            ))
+                        self._unstick(client, options['stale_after'])
+                        minted, failed = confirm_jobs(client, options['confirmations'])
+                        if minted or failed:
+                            self.stdout.write(f"Receipts: {minted} minted, {failed} failed")
+                        last_reconcile = time.monotonic()
+
+                    while len(in_flight) < concurrency and not self._stopping:
+                        batch = claim_batch(batch_size, window)
+                        if not batch:
+                            break
+                        if busy_since is None:
+                            busy_since = time.perf_counter()
+                        jobs += len(batch)
+                        in_flight.add(pool.submit(run_batch, client, batch, options['max_attempts']))
+
+                    if not in_flight:
+                        if options['once'] or self._stopping:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, in_flight = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    finished.extend(self._succeeded(done))
+                    if not in_flight:
+                        busy += time.perf_counter() - busy_since
+                        busy_since = None
+            except KeyboardInterrupt:
+                self._stopping = True
+                finished.extend(self._succeeded(wait(in_flight).done))
+        if busy_since is not None:
+            busy += time.perf_counter() - busy_since
+
+        submitted = sum(future.result()[0] for future in finished)
+        transactions = sum(future.result()[1] for future in finished)
+
+        summary = f"Mint worker stopped after {jobs} job(s): {submitted} submitted in {transactions} transaction(s)"
+        if submitted:
+            summary += (
+                f", {transactions / submitted:.2f} tx/mint, "
+                f"{busy / submitted * 100:.2f}s busy per 100 mints"
+            )
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def _succeeded(self, futures):
+        # A batch that raised (say a database error recording results) left
+        # its jobs running for reconcile_jobs; it counts toward no total
+        succeeded = []
+        for future in futures:
+            error = future.exception()
+            if error is None:
+                succeeded.append(future)
+            else:
+                logger.error("Mint batch failed: %s", error, exc_info=error)
+        return succeeded
+
+    def _unstick(self, client, min_age):
+        # A worker that died between allocating and signing, or a send that
+        # never reached a node, leaves a nonce gap every later mint waits on
+        try:
+            tx_hash = recover_stuck_nonce(client, min_age=min_age)
+        except Exception as e:
+            self.stderr.write(f"Could not replace stuck nonce: {e}")
+            return
+        if tx_hash:
+            self.stdout.write(self.style.WARNING(f"Replaced stuck nonce: {tx_hash}"))
+
+    def _stop(self, signum, frame):
+        # Finish in-flight mints, claim nothing new
+        self._stopping = True
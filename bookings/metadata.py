@@ -0,0 +1,227 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import PinnedMetadata
+
+logger = logging.getLogger(__name__)
+
+
+# CIDv1 prefix: version 1, raw codec (0x55), sha2-256 multihash of 32 bytes
+_CID_PREFIX = b"\x01\x55\x12\x20"
+
+
+class PinningError(OSError):
+    """Raised when a pinning service rejects or loses metadata; workers retry these."""
+
+
+def canonical_json(data):
+    """Stable bytes for ``data``: sorted keys, no whitespace, UTF-8."""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compute_cid(content):
+    """
+    CIDv1 (raw codec, sha2-256, base32) of ``content``. This is the CID IPFS
+    assigns a single-block file added with raw leaves, which is what Pinata
+    returns for small uploads with ``cidVersion: 1``.
+    """
+    digest = hashlib.sha256(content).digest()
+    return "b" + base64.b32encode(_CID_PREFIX + digest).decode("ascii").lower().rstrip("=")
+
+
+def render_metadata(booking, wallet_address):
+    """
+    ERC-721 metadata for a SoulStamp commemorating ``booking``. Only trip
+    facts go in, with no ids or timestamps, so identical trips by the same
+    traveller share one document and one CID.
+    """
+    data = {
+        "name": f"TrailProof: {booking.destination}",
+        "description": (
+            f"SoulStamp for a trip to {booking.destination} "
+            f"from {booking.start_date.isoformat()} to {booking.end_date.isoformat()}."
+        ),
+        "attributes": [
+            {"trait_type": "Destination", "value": booking.destination},
+            {"trait_type": "Start Date", "value": booking.start_date.isoformat()},
+            {"trait_type": "End Date", "value": booking.end_date.isoformat()},
+            {"trait_type": "Traveller", "value": wallet_address.lower()},
+        ],
+    }
+    if settings.MINT_METADATA_IMAGE_URI:
+        data["image"] = settings.MINT_METADATA_IMAGE_URI
+    return data
+
+
+def metadata_for_booking(booking, wallet_address):
+    """
+    The ``PinnedMetadata`` row for ``booking``, created unpinned on first
+    use. The CID is computed locally, so this needs no network access.
+    """
+    content = canonical_json(render_metadata(booking, wallet_address))
+    record, _ = PinnedMetadata.objects.get_or_create(
+        cid=compute_cid(content), defaults={'content': content.decode("utf-8")}
+    )
+    return record
+
+
+def metadata_uri(cid):
+    return f"{settings.METADATA_BASE_URI}{cid}"
+
+
+def pin_pending(records):
+    """
+    Uploads the unpinned metadata among ``records`` to the pinning backend
+    in one batch. Returns ``{cid: error}`` for the documents that failed.
+    Pinned documents are never uploaded again.
+    """
+    pending = {record.cid: record for record in records if record is not None and record.pinned_at is None}
+    if not pending:
+        return {}
+    # Another worker may have pinned some since these rows were loaded
+    pinned_elsewhere = PinnedMetadata.objects.filter(cid__in=pending, pinned_at__isnull=False).values_list(
+        'cid', flat=True
+    )
+    for cid in pinned_elsewhere:
+        del pending[cid]
+    if not pending:
+        return {}
+
+    results = get_pinning_backend().pin_many([(cid, record.content.encode("utf-8")) for cid, record in pending.items()])
+    failed = {}
+    for cid in pending:
+        outcome = results.get(cid, PinningError("No result from the pinning backend"))
+        if isinstance(outcome, Exception):
+            failed[cid] = outcome
+        elif outcome != cid:
+            # The service hashed different bytes; tokens must not point at an unpinned CID
+            failed[cid] = PinningError(f"Pinning service returned CID {outcome} for {cid}")
+
+    pinned = [cid for cid in pending if cid not in failed]
+    if pinned:
+        now = timezone.now()
+        PinnedMetadata.objects.filter(cid__in=pinned).update(pinned_at=now)
+        for cid in pinned:
+            pending[cid].pinned_at = now
+    for cid, error in failed.items():
+        logger.warning("Pinning metadata %s failed: %s", cid, error)
+    return failed
+
+
+# ----------------------------
+# Pinning backends
+# ----------------------------
+class PinningBackend:
+    """Stores metadata documents where token URIs can resolve them."""
+
+    def pin_many(self, items):
+        """
+        Pins each ``(cid, content)`` in ``items``. Returns a dict mapping each
+        cid to the CID the service reports, or to the exception for that item.
+        """
+        raise NotImplementedError
+
+
+class LocalPinningBackend(PinningBackend):
+    """
+    Writes documents to ``METADATA_LOCAL_DIR`` as ``<cid>.json``. For
+    development, tests and benchmarks. Nothing leaves the machine, so the
+    system checks refuse it when minting outside DEBUG.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or settings.METADATA_LOCAL_DIR
+
+    def pin_many(self, items):
+        os.makedirs(self.directory, exist_ok=True)
+        results = {}
+        for cid, content in items:
+            try:
+                with open(os.path.join(self.directory, f"{cid}.json"), "wb") as document:
+                    document.write(content)
+            except OSError as e:
+                results[cid] = PinningError(str(e))
+            else:
+                results[cid] = compute_cid(content)
+        return results
+
+
+class PinataPinningBackend(PinningBackend):
+    """
+    Pins through Pinata's pinFileToIPFS with CIDv1. A batch is uploaded
+    concurrently over one keep-alive session.
+    """
+
+    endpoint = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+
+    def __init__(self, jwt=None, timeout=30, concurrency=4):
+        self.jwt = jwt or settings.PINATA_JWT
+        if not self.jwt:
+            raise PinningError("PINATA_JWT is not set")
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+
+                self._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+                self._session.mount("https://", adapter)
+                self._session.headers["Authorization"] = f"Bearer {self.jwt}"
+        return self._session
+
+    def pin_many(self, items):
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(items)))) as pool:
+            outcomes = list(pool.map(lambda item: self._pin_safely(*item), items))
+        return {cid: outcome for (cid, _), outcome in zip(items, outcomes)}
+
+    def _pin_safely(self, cid, content):
+        try:
+            return self._pin(cid, content)
+        except Exception as e:
+            return e if isinstance(e, OSError) else PinningError(str(e))
+
+    def _pin(self, cid, content):
+        response = self.session.post(
+            self.endpoint,
+            files={"file": (f"{cid}.json", content, "application/json")},
+            data={
+                "pinataOptions": json.dumps({"cidVersion": 1}),
+                "pinataMetadata": json.dumps({"name": f"soulstamp-{cid}.json"}),
+            },
+            timeout=self.timeout,
+        )
+        if response.status_code >= 400:
+            raise PinningError(f"Pinata returned HTTP {response.status_code}: {response.text[:200]}")
+        return response.json()["IpfsHash"]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_pinning_backend():
+    """Returns the process-wide backend named by ``settings.METADATA_PINNING_BACKEND``."""
+    global _backend
+    if _backend is None:
+        if not settings.METADATA_PINNING_BACKEND:
+            raise ImproperlyConfigured("METADATA_PINNING_BACKEND is not set")
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.METADATA_PINNING_BACKEND)()
+    return _backend
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:54
+
+from django.db import migrations, models
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingRollup = apps.get_model('bookings', 'BookingRollup')
+    groups = (
+        Booking.objects.annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values('destination', 'month', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    BookingRollup.objects.bulk_create(
+        [
+            BookingRollup(destination=g['destination'], month=g['month'], status=g['status'], count=g['total'])
+            for g in groups.iterator(chunk_size=1000)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_destination_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destination', models.CharField(max_length=255)),
+                ('month', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'status'], name='booking_rollup_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('destination', 'month', 'status'), name='booking_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
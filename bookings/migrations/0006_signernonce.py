@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_bookingrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignerNonce',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42, unique=True)),
+                ('next_nonce', models.BigIntegerField(default=0)),
+                ('released', models.JSONField(blank=True, default=list)),
+                ('confirmed_nonce', models.BigIntegerField(default=0)),
+                ('confirmed_changed_at', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_mintjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChainCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('block_number', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SoulStampOwnership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contract_address', models.CharField(max_length=42)),
+                ('token_id', models.DecimalField(decimal_places=0, max_digits=78)),
+                ('owner', models.CharField(max_length=42)),
+                ('block_number', models.BigIntegerField()),
+                ('tx_hash', models.CharField(max_length=66)),
+                ('log_index', models.IntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contract_address', 'owner'], name='soulstamp_owner_idx')],
+                'constraints': [models.UniqueConstraint(fields=('contract_address', 'token_id'), name='soulstamp_token_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_soulstamp_ownership'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mintjob',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mint_jobs', to='bookings.booking'),
+        ),
+        migrations.AddField(
+            model_name='mintjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='mintjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key', ''), _negated=True), fields=('user', 'idempotency_key'), name='mintjob_user_idempotency_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='mintjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('booking__isnull', False), models.Q(('status', 'failed'), _negated=True)), fields=('user', 'booking'), name='mintjob_user_booking_live'),
+        ),
+    ]
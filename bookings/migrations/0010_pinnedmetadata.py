@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_mintjob_idempotency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PinnedMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cid', models.CharField(max_length=100, unique=True)),
+                ('content', models.TextField()),
+                ('pinned_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='mintjob',
+            name='metadata',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='mint_jobs', to='bookings.pinnedmetadata'),
+        ),
+    ]
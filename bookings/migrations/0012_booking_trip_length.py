@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:44
+
+import datetime
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+def check_trip_lengths(apps, schema_editor):
+    # Fail with the offending ids rather than a bare constraint violation;
+    # those rows need a human decision, not an automatic fix
+    Booking = apps.get_model('bookings', 'Booking')
+    invalid = Booking.objects.filter(
+        models.Q(end_date__lt=models.F('start_date'))
+        | models.Q(end_date__gt=models.F('start_date') + datetime.timedelta(days=365))
+    )
+    ids = list(invalid.values_list('id', flat=True)[:20])
+    if ids:
+        raise RuntimeError(
+            f"Bookings ending before they start or lasting over 365 days must be fixed first: {ids}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_trip_lengths, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(condition=models.Q(('end_date__gte', models.F('start_date')), ('end_date__lte', django.db.models.expressions.CombinedExpression(models.F('start_date'), '+', models.Value(datetime.timedelta(days=365))))), name='booking_trip_length'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_booking_trip_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mintjob',
+            name='nonce',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mintjob',
+            name='signed_tx',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='mintjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('unconfirmed', 'Unconfirmed'), ('submitted', 'Submitted'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_mintjob_signed_tx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mintjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('unconfirmed', 'Unconfirmed'), ('submitted', 'Submitted'), ('minted', 'Minted'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Furthest along first; that job is the one a wallet keeps
+STATUS_RANK = {'minted': 0, 'submitted': 1, 'unconfirmed': 2, 'running': 3, 'queued': 4}
+
+
+def fail_duplicate_live_jobs(apps, schema_editor):
+    # Jobs queued before the constraint may double up on a wallet. The
+    # contract mints once per wallet, so the extras could only revert.
+    MintJob = apps.get_model('bookings', 'MintJob')
+    kept = {}
+    superseded = []
+    live = MintJob.objects.exclude(status='failed').order_by('created_at', 'id')
+    for job in live.only('id', 'wallet_address', 'status'):
+        wallet = job.wallet_address.lower()
+        best = kept.get(wallet)
+        if best is None or STATUS_RANK.get(job.status, 9) < STATUS_RANK.get(best.status, 9):
+            if best is not None:
+                superseded.append((best.id, job.id))
+            kept[wallet] = job
+        else:
+            superseded.append((job.id, best.id))
+    for job_id, kept_id in superseded:
+        MintJob.objects.filter(pk=job_id).update(
+            status='failed', error=f"Superseded by mint job {kept_id}: one live mint per wallet"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_mintjob_minted_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_live_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mintjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'failed'), _negated=True), fields=('wallet_address',), name='mintjob_wallet_live'),
+        ),
+    ]
@@ -0,0 +1,379 @@
+import json
+import logging
+import threading
+import time
+from functools import cached_property
+
+from django.conf import settings
+
+from core import lazy
+from core.rpc import never_sent, pooled_web3
+
+from .gas import GasOracle
+from .signer import NonceAllocator
+
+logger = logging.getLogger(__name__)
+
+
+# Multi-recipient mint functions taking (address[] to, string[] uris)
+BATCH_MINT_FUNCTIONS = ("batchMint", "mintBatch")
+
+
+class MintError(Exception):
+    """Raised when a SoulStamp mint cannot be submitted."""
+
+
+class MintUnavailable(MintError):
+    """Raised when minting is not configured or the RPC endpoint is unhealthy."""
+
+
+class NotBroadcast(MintError):
+    """A mint that failed before any node saw it: it could not be built, signed or recorded."""
+
+
+class TransactionRejected(MintError):
+    """A node answered the broadcast with an error."""
+
+    # Rejections meaning the nonce is in use, possibly by this very transaction
+    NONCE_TAKEN = ("already known", "nonce too low", "replacement transaction underpriced")
+
+    @property
+    def nonce_taken(self):
+        message = str(self).lower()
+        return any(hint in message for hint in self.NONCE_TAKEN)
+
+
+def never_broadcast(error):
+    """
+    True when ``error`` proves no node holds the mint transaction, so its
+    nonce can be reused and the mint retried with a new transaction.
+    False means a node may have it, e.g. a timeout after the request went
+    out; retrying then could mint twice.
+    """
+    if isinstance(error, (MintUnavailable, NotBroadcast)):
+        return True
+    if isinstance(error, TransactionRejected):
+        return not error.nonce_taken
+    return never_sent(error)
+
+
+def _not_broadcast(error):
+    wrapped = NotBroadcast(str(error))
+    wrapped.__cause__ = error
+    return wrapped
+
+
+def load_abi(path):
+    with open(path) as abi_file:
+        artifact = json.load(abi_file)
+    # Hardhat artifacts wrap the ABI; a bare ABI list works too
+    return artifact["abi"] if isinstance(artifact, dict) else artifact
+
+
+class MintClient:
+    """
+    Process-wide handle on the SoulStamp contract and signer.
+
+    The Web3 instance, ABI, contract and signer account are built once.
+    Web3 runs over an ``RPCPool`` of ``rpc_urls``, with keep-alive sessions
+    and failover between endpoints. Health is cached: one ``eth_chainId``
+    probe is trusted for ``health_ttl`` seconds. Successful sends extend
+    that window, and transport errors end it. A failed probe makes
+    ``ensure_healthy`` fail fast for ``retry_after`` seconds instead of
+    timing out on every request.
+
+    Nonces come from a shared ``NonceAllocator``. Fees and gas limits come
+    from a ``GasOracle`` that refreshes in the background and memoizes
+    estimates. The chain id is cached. So a steady-state ``mint`` is a
+    single RPC, ``eth_sendRawTransaction``.
+
+    Pass ``w3`` to use another provider, e.g. EthereumTesterProvider in
+    benchmarks.
+    """
+
+    # Used when estimate_gas fails (e.g. the call would revert)
+    fallback_gas_limit = 300000
+
+    def __init__(self, rpc_urls=None, contract_address=None, private_key=None, abi_path=None,
+                 w3=None, health_ttl=30, retry_after=5, pool_size=10, timeout=15, nonce_resync_interval=300,
+                 gas_oracle_ttl=15, gas_margin=1.2, max_fee_gwei=0):
+        Web3 = lazy.web3()
+        self.w3 = w3 if w3 is not None else pooled_web3(rpc_urls, pool_size, timeout)
+        self.contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(contract_address),
+            abi=load_abi(abi_path),
+        )
+        self.account = lazy.eth_account().from_key(private_key)
+        self.nonces = NonceAllocator(self.w3, self.address, resync_interval=nonce_resync_interval)
+        self.gas = GasOracle(self.w3, ttl=gas_oracle_ttl, margin=gas_margin, max_fee_gwei=max_fee_gwei)
+        self.health_ttl = health_ttl
+        self.retry_after = retry_after
+        self._chain_id = None
+        self._healthy_until = 0.0
+        self._unhealthy_until = 0.0
+        self._health_lock = threading.Lock()
+
+    @property
+    def address(self):
+        return self.account.address
+
+    @property
+    def chain_id(self):
+        self.ensure_healthy()
+        return self._chain_id
+
+    def ensure_healthy(self):
+        """Raises ``MintUnavailable`` unless the endpoint answered recently."""
+        now = time.monotonic()
+        if now < self._healthy_until:
+            return
+        if now < self._unhealthy_until:
+            raise MintUnavailable("RPC connection failed")
+        with self._health_lock:
+            if time.monotonic() < self._healthy_until:
+                return
+            try:
+                self._chain_id = self.w3.eth.chain_id
+            except Exception as e:
+                self._unhealthy_until = time.monotonic() + self.retry_after
+                logger.warning("Mint RPC health check failed: %s", e)
+                raise MintUnavailable("RPC connection failed") from e
+            self.mark_healthy()
+
+    def mark_healthy(self):
+        self._healthy_until = time.monotonic() + self.health_ttl
+
+    def mark_unhealthy(self):
+        self._healthy_until = 0.0
+
+    def build_mint(self, to, metadata_uri, nonce):
+        """Unsigned mint transaction; no RPC once fees and the gas estimate are cached."""
+        args = (lazy.web3().to_checksum_address(to), metadata_uri)
+        call = self.contract.functions.mint(*args)
+        return self._build(call, nonce, self._gas_limit("mint", call, args, self.fallback_gas_limit))
+
+    def _gas_limit(self, function_name, call, args, fallback):
+        return self.gas.gas_limit(
+            function_name, args, lambda: call.estimate_gas({"from": self.address}), fallback
+        )
+
+    def _build(self, call, nonce, gas):
+        return call.build_transaction({
+            "from": self.address,
+            "nonce": nonce,
+            "chainId": self._chain_id,
+            "gas": gas,
+            **self.gas.fees(),
+        })
+
+    @cached_property
+    def batch_entrypoint(self):
+        """
+        Name of the contract's multi-recipient mint, if its ABI has one:
+        ``batchMint``/``mintBatch(address[], string[])`` or ``multicall(bytes[])``.
+        """
+        for entry in self.contract.abi:
+            if entry.get("type") != "function":
+                continue
+            inputs = [arg["type"] for arg in entry.get("inputs", [])]
+            if entry["name"] in BATCH_MINT_FUNCTIONS and inputs == ["address[]", "string[]"]:
+                return entry["name"]
+            if entry["name"] == "multicall" and inputs == ["bytes[]"]:
+                return entry["name"]
+        return None
+
+    def send(self, txn):
+        """Signs ``txn`` locally and broadcasts it, returning the tx hash as hex."""
+        return self.broadcast(self.account.sign_transaction(txn).raw_transaction)
+
+    def broadcast(self, raw_transaction):
+        """
+        Sends a signed transaction, returning its hash as hex. Transport
+        errors propagate unchanged; any answer from the node other than a
+        hash raises ``TransactionRejected``.
+        """
+        try:
+            tx_hash = self.w3.eth.send_raw_transaction(raw_transaction)
+        except (OSError, lazy.requests_exceptions().RequestException):
+            self.mark_unhealthy()
+            raise
+        except Exception as e:
+            raise TransactionRejected(str(e)) from e
+        self.mark_healthy()
+        return lazy.web3().to_hex(tx_hash)
+
+    def mint(self, to, metadata_uri):
+        self.ensure_healthy()
+        nonce = self.nonces.allocate()
+        try:
+            signed = self.account.sign_transaction(self.build_mint(to, metadata_uri, nonce))
+        except Exception as e:
+            self.nonces.release(nonce)
+            raise _not_broadcast(e) from e
+        try:
+            return self.broadcast(signed.raw_transaction)
+        except Exception as e:
+            self.handle_send_failure(e, [nonce])
+            raise
+
+    def handle_send_failure(self, error, nonces):
+        """
+        Decides what happens to ``nonces`` after a failed broadcast.
+
+        - No node can have the transaction (``never_broadcast``): the
+          nonces are released for reuse.
+        - The node reports the nonce taken ("nonce too low", "already
+          known"): the allocator resyncs from chain.
+        - Anything else, e.g. a read timeout: the node may have the
+          transaction, so the nonces are left for resync and
+          stuck-transaction recovery.
+        """
+        if never_broadcast(error):
+            self.nonces.release(*nonces)
+        elif isinstance(error, TransactionRejected):
+            self.nonces.resync()
+
+    def mint_many(self, items, on_signed=None):
+        """
+        Mints to each ``(to, metadata_uri)`` in ``items``. Returns one entry
+        per item, in order: the tx hash, or the exception for that recipient.
+
+        If the contract has a batch entrypoint, every recipient goes into one
+        transaction. Otherwise the mints get contiguous nonces, are signed
+        locally, and are broadcast as a single JSON-RPC batch: one HTTP round
+        trip for the whole group.
+
+        ``on_signed`` is called before anything is broadcast, with a list of
+        ``(item_index, nonce, tx_hash, raw_transaction)``, so the caller can
+        record what is about to go out. If it raises, nothing is sent and
+        those items fail with ``NotBroadcast``.
+        """
+        self.ensure_healthy()
+        if self.batch_entrypoint and len(items) > 1:
+            return self._mint_in_one_transaction(items, on_signed)
+        return self._mint_pipelined(items, on_signed)
+
+    def _mint_in_one_transaction(self, items, on_signed):
+        Web3 = lazy.web3()
+        recipients = [Web3.to_checksum_address(to) for to, _ in items]
+        uris = [uri for _, uri in items]
+        if self.batch_entrypoint == "multicall":
+            calls = [self.contract.encode_abi("mint", args=[to, uri]) for to, uri in zip(recipients, uris)]
+            call = self.contract.functions.multicall(calls)
+        else:
+            call = getattr(self.contract.functions, self.batch_entrypoint)(recipients, uris)
+        gas = self._gas_limit(self.batch_entrypoint, call, (recipients, uris), self.fallback_gas_limit * len(items))
+
+        nonce = self.nonces.allocate()
+        try:
+            signed = self.account.sign_transaction(self._build(call, nonce, gas))
+            if on_signed:
+                tx_hash = Web3.to_hex(signed.hash)
+                on_signed([(index, nonce, tx_hash, signed.raw_transaction) for index in range(len(items))])
+        except Exception as e:
+            self.nonces.release(nonce)
+            return [_not_broadcast(e)] * len(items)
+        try:
+            tx_hash = self.broadcast(signed.raw_transaction)
+        except Exception as e:
+            self.handle_send_failure(e, [nonce])
+            return [e] * len(items)
+        return [tx_hash] * len(items)
+
+    def _mint_pipelined(self, items, on_signed):
+        Web3 = lazy.web3()
+        results = [None] * len(items)
+        valid = []
+        for index, (to, uri) in enumerate(items):
+            # Reject bad recipients before they can strand a nonce mid-batch
+            try:
+                valid.append((index, Web3.to_checksum_address(to), uri))
+            except Exception as e:
+                results[index] = _not_broadcast(e)
+
+        nonces = self.nonces.allocate_many(len(valid)) if valid else []
+        signed = []
+        for nonce, (index, to, uri) in zip(nonces, valid):
+            try:
+                signed.append((index, nonce, self.account.sign_transaction(self.build_mint(to, uri, nonce))))
+            except Exception as e:
+                self.nonces.release(nonce)
+                results[index] = _not_broadcast(e)
+
+        if signed and on_signed:
+            try:
+                on_signed([(index, nonce, Web3.to_hex(txn.hash), txn.raw_transaction) for index, nonce, txn in signed])
+            except Exception as e:
+                self.nonces.release(*(nonce for _, nonce, _ in signed))
+                for index, _, _ in signed:
+                    results[index] = _not_broadcast(e)
+                return results
+
+        try:
+            sent = self._send_raw_batch([txn.raw_transaction for _, _, txn in signed])
+        except Exception as e:
+            sent = [e] * len(signed)
+        for (index, nonce, _), outcome in zip(signed, sent):
+            if isinstance(outcome, Exception):
+                self.handle_send_failure(outcome, [nonce])
+            results[index] = outcome
+        return results
+
+    def _send_raw_batch(self, raw_transactions):
+        if not raw_transactions:
+            return []
+        Web3 = lazy.web3()
+        transport_errors = (OSError, lazy.requests_exceptions().RequestException)
+        payload = [("eth_sendRawTransaction", [Web3.to_hex(raw)]) for raw in raw_transactions]
+        batch_request_func = getattr(self.w3.provider, "batch_request_func", None)
+        try:
+            responses = batch_request_func(self.w3, self.w3.middleware_onion)(payload) if batch_request_func else None
+        except NotImplementedError:
+            responses = None
+        except transport_errors as e:
+            self.mark_unhealthy()
+            return [e] * len(raw_transactions)
+
+        if isinstance(responses, list) and len(responses) == len(raw_transactions):
+            self.mark_healthy()
+            return [
+                TransactionRejected(response["error"].get("message", str(response["error"])))
+                if response.get("error") else response["result"]
+                for response in responses
+            ]
+
+        # Provider or endpoint without JSON-RPC batching: send one by one
+        results = []
+        for raw in raw_transactions:
+            try:
+                results.append(self.broadcast(raw))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_mint_client():
+    """Returns the process-wide ``MintClient``, building it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not (settings.RPC_ENDPOINTS and settings.MINT_CONTRACT_ADDRESS and settings.MINT_PRIVATE_KEY):
+                    raise MintUnavailable("Minting is not configured")
+                _client = MintClient(
+                    rpc_urls=settings.RPC_ENDPOINTS,
+                    contract_address=settings.MINT_CONTRACT_ADDRESS,
+                    private_key=settings.MINT_PRIVATE_KEY,
+                    abi_path=settings.MINT_ABI_PATH,
+                    health_ttl=settings.MINT_RPC_HEALTH_TTL,
+                    pool_size=settings.MINT_RPC_POOL_SIZE,
+                    nonce_resync_interval=settings.MINT_NONCE_RESYNC_INTERVAL,
+                    gas_oracle_ttl=settings.MINT_GAS_ORACLE_TTL,
+                    gas_margin=settings.MINT_GAS_MARGIN,
+                    max_fee_gwei=settings.MINT_MAX_FEE_GWEI,
+                )
+    return _client
@@ -1,6 +1,36 @@
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 from accounts.models import CustomUser
 
+# Longest allowed trip, enforced by the booking_trip_length constraint.
+# BookingQuerySet.overlapping() relies on it to bound its index scan.
+MAX_TRIP_DAYS = 365
+
+
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        return self.exclude(status='cancelled')
+
+    def overlapping(self, start_date, end_date):
+        """
+        Bookings whose [start_date, end_date] intersects the given range.
+
+        The booking_trip_length constraint caps trips at ``MAX_TRIP_DAYS``,
+        so any overlapping booking starts within that many days before
+        ``start_date``. Bounding start_date on both sides turns the lookup
+        into a range scan on the (user, start_date, end_date) index instead
+        of a scan of every earlier booking.
+        """
+        earliest_start = start_date - timedelta(days=MAX_TRIP_DAYS)
+        return self.filter(
+            start_date__gte=earliest_start,
+            start_date__lte=end_date,
+            end_date__gte=start_date,
+        )
+
+
 class Booking(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='bookings')
     destination = models.CharField(max_length=255)
@@ -12,6 +42,201 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled')
     ], default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded rollup key so signals can move counts on change
+        if {'destination', 'status', 'created_at'}.issubset(instance.__dict__):
+            instance._rollup_key = instance.rollup_key()
+        return instance
+
+    def rollup_key(self):
+        """(destination, month, status) bucket in BookingRollup; matches TruncMonth('created_at')."""
+        return (self.destination, timezone.localtime(self.created_at).date().replace(day=1), self.status)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's bookings, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='booking_user_created_idx'),
+            # Date-range overlap checks (see BookingQuerySet.overlapping)
+            models.Index(fields=['user', 'start_date', 'end_date'], name='booking_user_dates_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(end_date__gte=models.F('start_date'))
+                & models.Q(end_date__lte=models.F('start_date') + timedelta(days=MAX_TRIP_DAYS)),
+                name='booking_trip_length',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} → {self.destination}"
+
+
+class BookingRollup(models.Model):
+    """
+    Booking counts per (destination, month, status), kept current by
+    bookings.rollups so dashboards read O(groups) rows instead of scanning
+    Booking. ``month`` is the first day of the month the booking was created.
+    """
+    destination = models.CharField(max_length=255)
+    month = models.DateField()
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['destination', 'month', 'status'], name='booking_rollup_key'),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'status'], name='booking_rollup_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.destination} {self.month:%Y-%m} {self.status}: {self.count}"
+
+
+class SignerNonce(models.Model):
+    """
+    Next transaction nonce for a minting signer, shared by every thread and
+    process. Rows are locked with SELECT ... FOR UPDATE (see bookings.signer).
+    """
+    address = models.CharField(max_length=42, unique=True)
+    next_nonce = models.BigIntegerField(default=0)
+    # Allocated but never broadcast; handed out again before next_nonce
+    released = models.JSONField(default=list, blank=True)
+    # Mined transaction count at the last sync, and when it last moved
+    confirmed_nonce = models.BigIntegerField(default=0)
+    confirmed_changed_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.address} next={self.next_nonce}"
+
+
+class PinnedMetadata(models.Model):
+    """
+    A SoulStamp metadata document keyed by its locally computed CIDv1.
+    ``pinned_at`` is set once the pinning backend holds it, after which it is
+    never uploaded again.
+    """
+    cid = models.CharField(max_length=100, unique=True)
+    content = models.TextField()
+    pinned_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.cid
+
+
+class MintJob(models.Model):
+    """
+    A queued SoulStamp mint, drained by the run_mint_worker command.
+
+    A user has at most one job per ``idempotency_key`` and one live
+    (not failed) job per booking, and a wallet has one live job in all,
+    since a wallet holds a single SoulStamp. The unique constraints enforce
+    this, so concurrent retries cannot queue a second mint.
+
+    The signed transaction is stored before it is broadcast. A job whose
+    broadcast ended ambiguously is ``unconfirmed`` until
+    ``bookings.jobs.reconcile_jobs`` finds that transaction on chain or
+    proves it can never be mined; it is never signed afresh before then.
+    A ``submitted`` job becomes ``minted`` or ``failed`` from its receipt
+    (``bookings.jobs.confirm_jobs``).
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('unconfirmed', 'Unconfirmed'),
+        ('submitted', 'Submitted'),
+        ('minted', 'Minted'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='mint_jobs')
+    booking = models.ForeignKey(
+        Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='mint_jobs'
+    )
+    idempotency_key = models.CharField(max_length=255, blank=True, default='')
+    wallet_address = models.CharField(max_length=42)
+    metadata = models.ForeignKey(
+        PinnedMetadata, on_delete=models.PROTECT, null=True, blank=True, related_name='mint_jobs'
+    )
+    metadata_uri = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    tx_hash = models.CharField(max_length=66, blank=True, default='')
+    nonce = models.BigIntegerField(null=True, blank=True)
+    # Hex of the signed transaction, so an ambiguous send is rebroadcast unchanged
+    signed_tx = models.TextField(blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest queued jobs
+            models.Index(fields=['status', 'created_at'], name='mintjob_status_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                condition=~models.Q(idempotency_key=''),
+                name='mintjob_user_idempotency_key',
+            ),
+            # A failed mint drops out so the booking can be minted again
+            models.UniqueConstraint(
+                fields=['user', 'booking'],
+                condition=models.Q(booking__isnull=False) & ~models.Q(status='failed'),
+                name='mintjob_user_booking_live',
+            ),
+            models.UniqueConstraint(
+                fields=['wallet_address'],
+                condition=~models.Q(status='failed'),
+                name='mintjob_wallet_live',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Mint #{self.pk} → {self.wallet_address} ({self.status})"
+
+
+class ChainCursor(models.Model):
+    """Last block a chain indexer has fully ingested, keyed by indexer name."""
+    name = models.CharField(max_length=100, unique=True)
+    block_number = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.block_number}"
+
+
+class SoulStampOwnership(models.Model):
+    """
+    Current holder of each SoulStamp token, built from the contract's Transfer
+    logs by the index_soulstamps command. Addresses are stored lowercase.
+    """
+    contract_address = models.CharField(max_length=42)
+    token_id = models.DecimalField(max_digits=78, decimal_places=0)
+    owner = models.CharField(max_length=42)
+    block_number = models.BigIntegerField()
+    tx_hash = models.CharField(max_length=66)
+    log_index = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contract_address', 'token_id'], name='soulstamp_token_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['contract_address', 'owner'], name='soulstamp_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"SoulStamp #{self.token_id} → {self.owner}"
@@ -0,0 +1,196 @@
+import logging
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from core import lazy
+from core.rpc import pinned, pooled_web3
+
+from .models import ChainCursor, SoulStampOwnership
+
+logger = logging.getLogger(__name__)
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_ADDRESS = "0x" + "0" * 40
+
+# How nodes and providers refuse an eth_getLogs range as too large (geth,
+# Erigon, Infura, Alchemy, QuickNode, Ankr). Rate-limit and timeout errors
+# must not match: a smaller range would not help them.
+RANGE_TOO_LARGE = re.compile(
+    r"query returned more than \d+ results"
+    r"|log response size exceeded"
+    r"|response size (?:should not exceed|exceeded)"
+    r"|block range (?:is )?too (?:large|wide)"
+    r"|exceeds? (?:the )?max(?:imum)? block range"
+    r"|limited to a [\d,]+ (?:block )?range"
+    r"|too many (?:logs|results)",
+    re.IGNORECASE,
+)
+
+
+def _hex(value):
+    """Hex digits of a topic or hash without the 0x prefix (HexBytes or str)."""
+    digits = value.hex() if isinstance(value, bytes) else str(value)
+    return digits[2:] if digits.startswith("0x") else digits
+
+
+def _topic_address(topic):
+    return "0x" + _hex(topic)[-40:].lower()
+
+
+def _topic_int(topic):
+    return int(_hex(topic) or "0", 16)
+
+
+def minted_recipients(receipt, contract_address):
+    """Lowercase addresses the contract minted to (Transfer from zero) in a transaction receipt."""
+    contract_address = contract_address.lower()
+    return {
+        _topic_address(log['topics'][2])
+        for log in receipt['logs']
+        if len(log['topics']) == 4
+        and "0x" + _hex(log['address']).lower() == contract_address
+        and "0x" + _hex(log['topics'][0]) == TRANSFER_TOPIC
+        and _topic_address(log['topics'][1]) == ZERO_ADDRESS
+    }
+
+
+def owned_soulstamp(wallet_address, contract_address=None):
+    """The indexed ``SoulStampOwnership`` row for ``wallet_address``, or None."""
+    contract_address = (contract_address or settings.MINT_CONTRACT_ADDRESS or "").lower()
+    return SoulStampOwnership.objects.filter(
+        contract_address=contract_address, owner=wallet_address.lower()
+    ).first()
+
+
+def indexed_through_block(contract_address=None):
+    """Last block ingested for the contract, or None before the first pass."""
+    contract_address = (contract_address or settings.MINT_CONTRACT_ADDRESS or "").lower()
+    return ChainCursor.objects.filter(name=f"soulstamp:{contract_address}").values_list(
+        'block_number', flat=True
+    ).first()
+
+
+class OwnershipIndexer:
+    """
+    Mirrors SoulStamp ownership into ``SoulStampOwnership`` from Transfer logs.
+
+    Each pass reads ``eth_getLogs`` in ranges of up to ``batch_blocks``
+    blocks, from the stored ``ChainCursor`` up to ``head - confirmations``.
+    Blocks that shallow cannot be reorged out, so rows never need rolling
+    back. Each range is applied in one transaction together with the cursor
+    advance, so a crash re-reads at most one range. When a node rejects a
+    range as too large, the range is halved and retried.
+
+    A pass reads the head and the logs from one pinned endpoint. A node
+    lagging behind the one that reported the head would otherwise answer
+    for blocks it lacks with no logs, and the cursor would skip them.
+
+    Topics are decoded directly (ERC-721 indexes from, to and tokenId), so
+    no ABI is needed.
+    """
+
+    def __init__(self, w3, contract_address, start_block=0, batch_blocks=2000, confirmations=12):
+        self.w3 = w3
+        self.contract_address = contract_address.lower()
+        self.start_block = start_block
+        self.batch_blocks = max(1, batch_blocks)
+        self.confirmations = confirmations
+        self.cursor_name = f"soulstamp:{self.contract_address}"
+
+    def cursor(self):
+        cursor, _ = ChainCursor.objects.get_or_create(
+            name=self.cursor_name, defaults={'block_number': self.start_block - 1}
+        )
+        return cursor.block_number
+
+    def reset(self, block_number):
+        """Re-ingests from ``block_number`` on the next pass."""
+        ChainCursor.objects.update_or_create(name=self.cursor_name, defaults={'block_number': block_number - 1})
+
+    def run_once(self):
+        """Ingests every confirmed block past the cursor. Returns (blocks, transfers)."""
+        with pinned(self.w3):
+            return self._run()
+
+    def _run(self):
+        safe_head = self.w3.eth.block_number - self.confirmations
+        from_block = self.cursor() + 1
+        blocks = transfers = 0
+        span = self.batch_blocks
+        while from_block <= safe_head:
+            to_block = min(from_block + span - 1, safe_head)
+            try:
+                logs = self.w3.eth.get_logs({
+                    'address': lazy.web3().to_checksum_address(self.contract_address),
+                    'fromBlock': from_block,
+                    'toBlock': to_block,
+                    'topics': [TRANSFER_TOPIC],
+                })
+            except Exception as e:
+                if span == 1 or not _range_too_large(e):
+                    raise
+                span = max(1, span // 2)
+                logger.info("eth_getLogs range too large, retrying with %s blocks", span)
+                continue
+
+            self._apply(logs, to_block)
+            transfers += len(logs)
+            blocks += to_block - from_block + 1
+            from_block = to_block + 1
+            # Grow back gradually so one dense range doesn't shrink every later query
+            span = min(self.batch_blocks, span * 2)
+        return blocks, transfers
+
+    def _apply(self, logs, to_block):
+        # Only the last transfer of each token in the range matters
+        latest = {}
+        for log in sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex'])):
+            topics = log['topics']
+            if len(topics) < 4:
+                continue
+            latest[_topic_int(topics[3])] = (_topic_address(topics[2]), log)
+
+        burned = [token_id for token_id, (owner, _) in latest.items() if owner == ZERO_ADDRESS]
+        rows = [
+            SoulStampOwnership(
+                contract_address=self.contract_address,
+                token_id=token_id,
+                owner=owner,
+                block_number=log['blockNumber'],
+                tx_hash="0x" + _hex(log['transactionHash']),
+                log_index=log['logIndex'],
+            )
+            for token_id, (owner, log) in latest.items()
+            if owner != ZERO_ADDRESS
+        ]
+        with transaction.atomic():
+            if burned:
+                SoulStampOwnership.objects.filter(
+                    contract_address=self.contract_address, token_id__in=burned
+                ).delete()
+            if rows:
+                SoulStampOwnership.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=['contract_address', 'token_id'],
+                    update_fields=['owner', 'block_number', 'tx_hash', 'log_index', 'updated_at'],
+                )
+            ChainCursor.objects.filter(name=self.cursor_name).update(block_number=to_block)
+
+
+def _range_too_large(error):
+    return RANGE_TOO_LARGE.search(str(error)) is not None
+
+
+def get_indexer(w3=None):
+    """An ``OwnershipIndexer`` for ``settings.MINT_CONTRACT_ADDRESS`` over a read-only connection."""
+    return OwnershipIndexer(
+        w3 or pooled_web3(pool_size=2, timeout=30),
+        settings.MINT_CONTRACT_ADDRESS,
+        start_block=settings.MINT_INDEX_START_BLOCK,
+        batch_blocks=settings.MINT_INDEX_BATCH_BLOCKS,
+        confirmations=settings.MINT_INDEX_CONFIRMATIONS,
+    )
@@ -0,0 +1,96 @@
+"""
+Incremental maintenance of BookingRollup.
+
+The counts are kept by the Booking signals in bookings.signals and by
+``record_created`` after bulk inserts. Writes that send no signals do not
+reach them:
+
+- ``QuerySet.update()`` and ``bulk_update()`` of destination or status
+- ``bulk_create()`` not followed by ``record_created``
+- raw SQL and changes made directly in the database
+
+After any of these the rollups drift from Booking until
+``manage.py rebuild_booking_rollups`` recomputes them.
+``QuerySet.delete()`` is safe, because Django sends post_delete for each row.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DateField, F
+from django.db.models.functions import TruncMonth
+
+from .models import Booking, BookingRollup
+
+
+def apply_deltas(deltas):
+    """
+    Adds each ``{(destination, month, status): delta}`` to its rollup row.
+
+    Existing rows are bumped with a single UPDATE ... SET count = count + n.
+    A missing row is inserted inside a savepoint. If a concurrent writer
+    inserts it first, the IntegrityError falls back to the UPDATE. Keys are
+    applied in sorted order so concurrent batches lock rows in the same order.
+    """
+    for (destination, month, status), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        rows = BookingRollup.objects.filter(destination=destination, month=month, status=status)
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                BookingRollup.objects.create(destination=destination, month=month, status=status, count=delta)
+        except IntegrityError:
+            rows.update(count=F('count') + delta)
+
+
+def record_created(bookings):
+    """Counts newly inserted bookings, e.g. after ``bulk_create`` which sends no signals."""
+    deltas = Counter()
+    for booking in bookings:
+        booking._rollup_key = booking.rollup_key()
+        deltas[booking._rollup_key] += 1
+    apply_deltas(deltas)
+
+
+def record_change(booking, previous_key):
+    """Moves ``booking`` from ``previous_key`` to its current bucket, if it changed."""
+    key = booking.rollup_key()
+    booking._rollup_key = key
+    if key != previous_key:
+        apply_deltas({previous_key: -1, key: 1})
+
+
+def record_deleted(booking, key):
+    apply_deltas({key: -1})
+
+
+@transaction.atomic
+def rebuild(batch_size=1000):
+    """
+    Recomputes every rollup row from Booking. Returns the number of rows written.
+
+    On PostgreSQL the Booking table is locked against writes until the
+    rebuild commits. Otherwise a booking saved meanwhile could be counted
+    by the rebuild and again by its own signal, or by neither. Writers wait
+    for the lock. That is safe only when a booking write and its rollup
+    delta share one transaction, as they do in the API views and the admin.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOCK TABLE {connection.ops.quote_name(Booking._meta.db_table)} IN SHARE ROW EXCLUSIVE MODE"
+            )
+    BookingRollup.objects.all().delete()
+    groups = (
+        Booking.objects.annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values('destination', 'month', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    rows = [
+        BookingRollup(destination=g['destination'], month=g['month'], status=g['status'], count=g['total'])
+        for g in groups.iterator(chunk_size=batch_size)
+    ]
+    BookingRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
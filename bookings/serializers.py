@@ -1,8 +1,181 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Booking
+from rest_framework.settings import api_settings
+from accounts.models import CustomUser
+from core.exports import ExportParamsSerializer
+from .models import MAX_TRIP_DAYS, Booking, MintJob
+from .rollups import record_created
+
+
+def _overlap_message(booking_ids):
+    return f"These dates overlap your existing booking(s): {', '.join(map(str, booking_ids))}"
+
+
+def _lock_bookings_of(user):
+    """
+    Serializes booking writes per user for the rest of the transaction by
+    locking the user's row. Two concurrent requests could otherwise both
+    pass the overlap check and insert overlapping trips.
+    """
+    list(CustomUser.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+
+class BookingListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch of bookings in one pass and inserts them with a single
+    bulk_create. Overlaps are checked with one query covering the whole
+    batch's date span, plus against the other items in the batch.
+    Per-item errors come back in the same order as the input.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        errors = self._overlap_errors(items)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def _overlap_errors(self, items):
+        errors = [{} for _ in items]
+        active = [(i, attrs) for i, attrs in enumerate(items) if attrs.get('status', 'pending') != 'cancelled']
+        if not active:
+            return errors
+
+        existing = []
+        request = self.context.get('request')
+        if request:
+            span_start = min(attrs['start_date'] for _, attrs in active)
+            span_end = max(attrs['end_date'] for _, attrs in active)
+            existing = list(
+                Booking.objects.filter(user=request.user).active()
+                .overlapping(span_start, span_end)
+                .values_list('id', 'start_date', 'end_date')
+            )
+
+        for i, attrs in active:
+            start, end = attrs['start_date'], attrs['end_date']
+            messages = []
+            booking_ids = [pk for pk, s, e in existing if s <= end and e >= start]
+            if booking_ids:
+                messages.append(_overlap_message(booking_ids[:10]))
+            siblings = [j for j, other in active if j != i and other['start_date'] <= end and other['end_date'] >= start]
+            if siblings:
+                messages.append(f"These dates overlap item(s) {', '.join(map(str, siblings))} in this batch")
+            if messages:
+                errors[i] = {api_settings.NON_FIELD_ERRORS_KEY: messages}
+        return errors
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            if validated_data:
+                _lock_bookings_of(validated_data[0]['user'])
+                # Validation ran before the lock; check again under it
+                errors = self._overlap_errors(validated_data)
+                if any(errors):
+                    raise serializers.ValidationError(errors)
+            bookings = Booking.objects.bulk_create([Booking(**attrs) for attrs in validated_data])
+            # bulk_create sends no post_save, so count the batch here
+            record_created(bookings)
+        return bookings
+
 
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = '__all__'
-        read_only_fields = ['user', 'created_at']
+        read_only_fields = ['user', 'created_at', 'updated_at']
+        list_serializer_class = BookingListSerializer
+
+    def validate(self, attrs):
+        start_date = attrs['start_date']
+        end_date = attrs['end_date']
+        if end_date < start_date:
+            raise serializers.ValidationError({'end_date': "End date must be on or after the start date."})
+        if (end_date - start_date).days > MAX_TRIP_DAYS:
+            raise serializers.ValidationError(
+                {'end_date': f"Trips cannot be longer than {MAX_TRIP_DAYS} days."}
+            )
+
+        # Batches check overlaps once for all items (BookingListSerializer)
+        request = self.context.get('request')
+        in_batch = isinstance(self.parent, serializers.ListSerializer)
+        if request and not in_batch:
+            self._check_overlaps(request.user, attrs)
+        return attrs
+
+    def _check_overlaps(self, user, attrs):
+        if attrs.get('status', 'pending') == 'cancelled':
+            return
+        conflicts = Booking.objects.filter(user=user).active().overlapping(attrs['start_date'], attrs['end_date'])
+        if self.instance is not None:
+            conflicts = conflicts.exclude(pk=self.instance.pk)
+        conflict_ids = list(conflicts.values_list('id', flat=True)[:10])
+        if conflict_ids:
+            raise serializers.ValidationError(_overlap_message(conflict_ids))
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            _lock_bookings_of(validated_data['user'])
+            # validate() ran before the lock; check again under it
+            self._check_overlaps(validated_data['user'], validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            _lock_bookings_of(instance.user)
+            self._check_overlaps(instance.user, {
+                'start_date': validated_data.get('start_date', instance.start_date),
+                'end_date': validated_data.get('end_date', instance.end_date),
+                'status': validated_data.get('status', instance.status),
+            })
+            return super().update(instance, validated_data)
+
+
+class DateRangeSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': "End must be on or after start."})
+        return attrs
+
+
+class RollupQuerySerializer(serializers.Serializer):
+    group_by = serializers.ChoiceField(choices=['destination', 'month', 'status'])
+    start = serializers.DateField(required=False, help_text="First month included (any day in it)")
+    end = serializers.DateField(required=False, help_text="Last month included (any day in it)")
+    status = serializers.ChoiceField(choices=[c for c, _ in Booking._meta.get_field('status').choices], required=False)
+    destination = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        for bound in ('start', 'end'):
+            if bound in attrs:
+                attrs[bound] = attrs[bound].replace(day=1)
+        if 'start' in attrs and 'end' in attrs and attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': "End must be on or after start."})
+        return attrs
+
+
+class BookingExportParamsSerializer(ExportParamsSerializer):
+    status = serializers.ChoiceField(choices=[c for c, _ in Booking._meta.get_field('status').choices], required=False)
+
+
+class MintJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MintJob
+        fields = ['id', 'status', 'booking', 'wallet_address', 'tx_hash', 'error', 'attempts',
+                  'created_at', 'updated_at', 'submitted_at']
+        read_only_fields = fields
+
+
+class MintRequestSerializer(serializers.Serializer):
+    booking = serializers.PrimaryKeyRelatedField(
+        queryset=Booking.objects.all(), required=False, allow_null=True,
+        help_text="Booking this SoulStamp commemorates. Only one live mint is kept per booking."
+    )
+
+    def validate_booking(self, booking):
+        if booking is not None and booking.user_id != self.context['request'].user.id:
+            raise serializers.ValidationError("Booking not found.")
+        return booking
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import rollups
+from .models import Booking
+
+
+@receiver(pre_save, sender=Booking)
+def remember_rollup_key(sender, instance, raw, **kwargs):
+    # Instances loaded with deferred fields have no key from from_db
+    if raw or instance._state.adding or hasattr(instance, '_rollup_key'):
+        return
+    previous = Booking.objects.filter(pk=instance.pk).only('destination', 'status', 'created_at').first()
+    if previous is not None:
+        instance._rollup_key = previous.rollup_key()
+
+
+@receiver(post_save, sender=Booking)
+def update_rollups_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous_key = getattr(instance, '_rollup_key', None)
+    if created or previous_key is None:
+        rollups.record_created([instance])
+    else:
+        rollups.record_change(instance, previous_key)
+
+
+@receiver(post_delete, sender=Booking)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    key = getattr(instance, '_rollup_key', None) or instance.rollup_key()
+    rollups.record_deleted(instance, key)
@@ -0,0 +1,137 @@
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import SignerNonce
+
+logger = logging.getLogger(__name__)
+
+
+class NonceAllocator:
+    """
+    Hands out transaction nonces for one signer address without an RPC per mint.
+
+    The counter lives in a ``SignerNonce`` row. Every allocation locks that
+    row with SELECT ... FOR UPDATE, so threads and processes never share a
+    nonce. The row is synced from chain when it is created and then every
+    ``resync_interval`` seconds:
+
+    - a pending count ahead of ``next_nonce`` (transactions sent from the
+      same key elsewhere) moves the counter forward;
+    - released nonces already taken on chain are dropped.
+
+    A nonce whose transaction never reached the node goes back through
+    ``release`` and is reused first, so it does not leave a gap that stalls
+    every later mint. Gaps left by crashes are closed by
+    ``recover_stuck_nonce``, which ``run_mint_worker`` calls each time it
+    reconciles.
+    """
+
+    def __init__(self, w3, address, resync_interval=300):
+        self.w3 = w3
+        self.address = address
+        self.resync_interval = timedelta(seconds=resync_interval)
+
+    def allocate(self):
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count):
+        """``count`` nonces, lowest first. Released nonces are reused before fresh ones."""
+        with transaction.atomic():
+            row = self._locked_row()
+            if row.synced_at is None or timezone.now() - row.synced_at >= self.resync_interval:
+                self._sync(row)
+
+            released = sorted(row.released)
+            nonces = released[:count]
+            row.released = released[count:]
+            fresh = count - len(nonces)
+            nonces.extend(range(row.next_nonce, row.next_nonce + fresh))
+            row.next_nonce += fresh
+            row.save(update_fields=['next_nonce', 'released', 'confirmed_nonce', 'confirmed_changed_at', 'synced_at'])
+        return sorted(nonces)
+
+    def release(self, *nonces):
+        """Returns nonces whose transactions were never broadcast."""
+        with transaction.atomic():
+            row = self._locked_row()
+            row.released = sorted(set(row.released) | {n for n in nonces if n < row.next_nonce})
+            row.save(update_fields=['released'])
+
+    def resync(self, reset=False):
+        """
+        Syncs the row from chain immediately. With ``reset``, ``next_nonce``
+        moves back to the pending count and released nonces are dropped. Use
+        it only when no mint is between allocation and broadcast.
+        """
+        with transaction.atomic():
+            row = self._locked_row()
+            pending = self._sync(row)
+            if reset:
+                row.next_nonce = pending
+                row.released = []
+            row.save()
+        return row
+
+    def state(self):
+        return self._row_queryset().first()
+
+    def _row_queryset(self):
+        return SignerNonce.objects.filter(address=self.address)
+
+    def _locked_row(self):
+        row = self._row_queryset().select_for_update().first()
+        if row is not None:
+            return row
+        try:
+            with transaction.atomic():
+                return SignerNonce.objects.create(address=self.address)
+        except IntegrityError:
+            return self._row_queryset().select_for_update().get()
+
+    def _sync(self, row):
+        pending = self.w3.eth.get_transaction_count(self.address, 'pending')
+        latest = self.w3.eth.get_transaction_count(self.address, 'latest')
+        now = timezone.now()
+        if pending > row.next_nonce:
+            logger.info("Signer %s nonce moved %s -> %s from chain", self.address, row.next_nonce, pending)
+            row.next_nonce = pending
+        row.released = [n for n in row.released if n >= pending]
+        if latest != row.confirmed_nonce or row.confirmed_changed_at is None:
+            row.confirmed_nonce = latest
+            row.confirmed_changed_at = now
+        row.synced_at = now
+        return pending
+
+
+def recover_stuck_nonce(client, min_age=300, bump=1.25):
+    """
+    Unblocks the signer when its lowest outstanding nonce has not been mined
+    for ``min_age`` seconds. This happens when a transaction is underpriced,
+    or when a nonce was allocated but never broadcast.
+
+    Sends a 0-value self-transfer at that nonce with freshly fetched fees
+    scaled by ``bump``. Nodes require a replacement to beat the original by
+    10%, so if this one is refused as underpriced, retry with a larger bump.
+    Returns the replacement's tx hash, or None if nothing is stuck.
+    """
+    row = client.nonces.resync()
+    if row.confirmed_nonce >= row.next_nonce:
+        return None
+    if timezone.now() - row.confirmed_changed_at < timedelta(seconds=min_age):
+        return None
+
+    client.gas.refresh()
+    txn = {
+        'from': client.address,
+        'to': client.address,
+        'value': 0,
+        'nonce': row.confirmed_nonce,
+        'gas': 21000,
+        'chainId': client.chain_id,
+        **{field: int(value * bump) for field, value in client.gas.fees().items()},
+    }
+    logger.warning("Replacing stuck nonce %s for %s", row.confirmed_nonce, client.address)
+    return client.send(txn)
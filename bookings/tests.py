@@ -1,3 +1,463 @@
+import importlib.util
+import json
+import unittest
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from core.rpc import RateLimited
+
+from .jobs import IdempotencyKeyReused, WalletAlreadyMinting, confirm_jobs, enqueue_mint, reconcile_jobs
+from .models import Booking, MintJob, SignerNonce
+from .ownership import OwnershipIndexer, _range_too_large, owned_soulstamp
+from .signer import NonceAllocator, recover_stuck_nonce
+
+BENCH_FIXTURE = settings.BASE_DIR / "nomadlink_backend/contracts/soulstamp_bench.json"
+
+
+def make_user(index=0):
+    return CustomUser.objects.create_user(
+        wallet_address=f"0x{index + 1:040x}", username=f"traveller{index}"
+    )
+
+
+class _FakeEth:
+    block_number = 100
+
+    def __init__(self, pending, latest):
+        self.pending = pending
+        self.latest = latest
+        self.transactions = {}
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.pending if block_identifier == 'pending' else self.latest
+
+    def get_transaction(self, tx_hash):
+        from web3.exceptions import TransactionNotFound
+
+        if tx_hash not in self.transactions:
+            raise TransactionNotFound(tx_hash)
+        return self.transactions[tx_hash]
+
+    def get_transaction_receipt(self, tx_hash):
+        from web3.exceptions import TransactionNotFound
+
+        raise TransactionNotFound(tx_hash)
+
+
+class _FakeWeb3:
+    provider = None
+
+    def __init__(self, pending=0, latest=0):
+        self.eth = _FakeEth(pending, latest)
+
+
+class NonceAllocatorTests(TestCase):
+    address = "0x000000000000000000000000000000000000beef"
+
+    def test_allocates_from_the_pending_count(self):
+        allocator = NonceAllocator(_FakeWeb3(pending=7, latest=7), self.address)
+        self.assertEqual(allocator.allocate(), 7)
+        self.assertEqual(allocator.allocate_many(3), [8, 9, 10])
+        self.assertEqual(allocator.state().next_nonce, 11)
+
+    def test_released_nonces_are_reused_first(self):
+        allocator = NonceAllocator(_FakeWeb3(), self.address)
+        self.assertEqual(allocator.allocate_many(4), [0, 1, 2, 3])
+        allocator.release(1, 3)
+        self.assertEqual(allocator.allocate_many(3), [1, 3, 4])
+
+    def test_release_ignores_nonces_never_allocated(self):
+        allocator = NonceAllocator(_FakeWeb3(), self.address)
+        allocator.allocate_many(2)
+        allocator.release(1, 5)
+        self.assertEqual(allocator.state().released, [1])
+
+    def test_resync_follows_the_chain_forward(self):
+        w3 = _FakeWeb3()
+        allocator = NonceAllocator(w3, self.address)
+        allocator.allocate_many(3)
+        allocator.release(0)
+        # Another process sent five transactions from the same key
+        w3.eth.pending = w3.eth.latest = 5
+        row = allocator.resync()
+        self.assertEqual(row.next_nonce, 5)
+        self.assertEqual(row.released, [])
+        self.assertEqual(allocator.allocate(), 5)
+
+    def test_resync_with_reset_moves_back_to_the_pending_count(self):
+        w3 = _FakeWeb3()
+        allocator = NonceAllocator(w3, self.address)
+        allocator.allocate_many(5)
+        w3.eth.pending = 2
+        self.assertEqual(allocator.resync(reset=True).next_nonce, 2)
+
+
+class _FakeGas:
+    def refresh(self):
+        pass
+
+    def fees(self):
+        return {'maxFeePerGas': 100, 'maxPriorityFeePerGas': 10}
+
+
+class _FakeMintClient:
+    address = "0x000000000000000000000000000000000000beef"
+    chain_id = 1
+
+    def __init__(self, pending=0, latest=0):
+        self.w3 = _FakeWeb3(pending, latest)
+        self.nonces = NonceAllocator(self.w3, self.address)
+        self.gas = _FakeGas()
+        self.sent = []
+        self.broadcasts = []
+
+    def send(self, txn):
+        self.sent.append(txn)
+        return f"0x{len(self.sent):064x}"
+
+    def broadcast(self, raw_transaction):
+        self.broadcasts.append(raw_transaction)
+
+
+class StuckNonceRecoveryTests(TestCase):
+    def setUp(self):
+        self.mint = _FakeMintClient()
+        # A worker allocated two nonces and died before signing either
+        self.mint.nonces.allocate_many(2)
+
+    def age_gap(self, seconds):
+        SignerNonce.objects.update(
+            confirmed_changed_at=timezone.now() - timedelta(seconds=seconds)
+        )
+
+    def test_recent_gap_is_left_alone(self):
+        self.assertIsNone(recover_stuck_nonce(self.mint, min_age=600))
+        self.assertEqual(self.mint.sent, [])
+
+    def test_old_gap_is_filled_at_the_lowest_nonce(self):
+        self.age_gap(601)
+        self.assertIsNotNone(recover_stuck_nonce(self.mint, min_age=600, bump=2))
+        txn, = self.mint.sent
+        self.assertEqual((txn['nonce'], txn['to'], txn['value']), (0, self.mint.address, 0))
+        self.assertEqual(txn['maxFeePerGas'], 200)
+
+    def test_nothing_outstanding_is_not_stuck(self):
+        self.mint.w3.eth.pending = self.mint.w3.eth.latest = 2
+        self.age_gap(601)
+        self.assertIsNone(recover_stuck_nonce(self.mint, min_age=600))
+
+    def test_worker_replaces_the_stuck_nonce(self):
+        self.age_gap(601)
+        out = StringIO()
+        with mock.patch('bookings.management.commands.run_mint_worker.get_mint_client', return_value=self.mint):
+            call_command('run_mint_worker', '--once', '--stale-after', '600', stdout=out)
+        self.assertEqual([txn['nonce'] for txn in self.mint.sent], [0])
+        self.assertIn("Replaced stuck nonce", out.getvalue())
+
+
+class EnqueueMintTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.booking = Booking.objects.create(
+            user=self.user, destination="Lamu", start_date=date(2026, 3, 1), end_date=date(2026, 3, 5)
+        )
+
+    def test_same_idempotency_key_returns_the_first_job(self):
+        job, created = enqueue_mint(self.user, "ipfs://a", idempotency_key="k1")
+        again, created_again = enqueue_mint(self.user, "ipfs://a", idempotency_key="k1")
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, job.pk)
+        self.assertEqual(MintJob.objects.count(), 1)
+
+    def test_same_booking_returns_the_live_job(self):
+        job, _ = enqueue_mint(self.user, "ipfs://a", booking=self.booking)
+        again, created = enqueue_mint(self.user, "ipfs://a", booking=self.booking)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, job.pk)
+
+    def test_failed_job_lets_the_booking_be_minted_again(self):
+        job, _ = enqueue_mint(self.user, "ipfs://a", booking=self.booking)
+        MintJob.objects.filter(pk=job.pk).update(status='failed')
+        retry, created = enqueue_mint(self.user, "ipfs://a", booking=self.booking)
+        self.assertTrue(created)
+        self.assertNotEqual(retry.pk, job.pk)
+
+    def test_key_reused_for_another_booking_is_refused(self):
+        enqueue_mint(self.user, "ipfs://a", idempotency_key="k1")
+        with self.assertRaises(IdempotencyKeyReused):
+            enqueue_mint(self.user, "ipfs://a", booking=self.booking, idempotency_key="k1")
+
+    def test_wallet_keeps_one_live_job_across_bookings(self):
+        job, _ = enqueue_mint(self.user, "ipfs://a", booking=self.booking)
+        other = Booking.objects.create(
+            user=self.user, destination="Kilifi", start_date=date(2026, 4, 1), end_date=date(2026, 4, 2)
+        )
+        with self.assertRaises(WalletAlreadyMinting) as raised:
+            enqueue_mint(self.user, "ipfs://b", booking=other)
+        self.assertEqual(raised.exception.job.pk, job.pk)
+
+    def test_api_refuses_a_second_mint_for_the_wallet(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        first = client.post('/api/bookings/mint/', {'booking': self.booking.pk}, format='json')
+        second = client.post('/api/bookings/mint/')
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(second.json()['job_id'], first.json()['job_id'])
+
+    def test_api_replays_the_original_job(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        first = client.post('/api/bookings/mint/', headers={'Idempotency-Key': 'retry-1'})
+        second = client.post('/api/bookings/mint/', headers={'Idempotency-Key': 'retry-1'})
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['job_id'], first.json()['job_id'])
+
+
+class DroppedTransactionTests(TestCase):
+    def setUp(self):
+        self.mint = _FakeMintClient(pending=1, latest=0)
+        self.job = MintJob.objects.create(
+            user=make_user(), wallet_address="0x" + "1" * 40, metadata_uri="ipfs://a", status='submitted',
+            nonce=0, tx_hash="0x" + "ab" * 32, signed_tx="0x02f8", attempts=1,
+        )
+
+    def test_dropped_transaction_is_held_then_rebroadcast(self):
+        self.assertEqual(confirm_jobs(self.mint, confirmations=0), (0, 0))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'unconfirmed')
+        self.assertEqual(self.job.error, "Transaction dropped before it was mined")
+
+        outcomes = reconcile_jobs(self.mint, stale_after=600, max_attempts=3)
+        self.assertEqual(outcomes['rebroadcast'], 1)
+        self.assertEqual(self.mint.broadcasts, ["0x02f8"])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.tx_hash), ('submitted', "0x" + "ab" * 32))
+
+    def test_pending_transaction_stays_submitted(self):
+        self.mint.w3.eth.transactions[self.job.tx_hash] = {'hash': self.job.tx_hash}
+        confirm_jobs(self.mint, confirmations=0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'submitted')
+
+
+class MintWorkerTests(TestCase):
+    def test_failed_batch_is_logged_and_left_out_of_the_totals(self):
+        MintJob.objects.create(user=make_user(), wallet_address="0x" + "1" * 40, metadata_uri="ipfs://a")
+        out = StringIO()
+        with mock.patch('bookings.management.commands.run_mint_worker.get_mint_client',
+                        return_value=_FakeMintClient()), \
+                mock.patch('bookings.management.commands.run_mint_worker.run_batch',
+                           side_effect=RuntimeError("database is gone")), \
+                self.assertLogs('bookings.management.commands.run_mint_worker', 'ERROR') as logs:
+            call_command('run_mint_worker', '--once', '--batch-window-ms', '0', stdout=out)
+        self.assertIn("database is gone", logs.output[0])
+        self.assertIn("after 1 job(s): 0 submitted", out.getvalue())
+
+
+class BookingCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        start = date(2026, 1, 1)
+        Booking.objects.bulk_create([
+            Booking(user=self.user, destination=f"Stop {i}",
+                    start_date=start + timedelta(days=3 * i), end_date=start + timedelta(days=3 * i + 1))
+            for i in range(25)
+        ])
+        # Ties on created_at must still page by id without skipping or repeating rows
+        Booking.objects.filter(user=self.user).update(created_at=timezone.now())
+        Booking.objects.create(user=make_user(1), destination="Elsewhere",
+                               start_date=start, end_date=start)
+
+    def test_pages_cover_every_booking_once_newest_first(self):
+        seen, url = [], '/api/bookings/'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), settings.REST_FRAMEWORK['PAGE_SIZE'])
+            seen.extend(booking['id'] for booking in page['results'])
+            url = page['next']
+        self.assertEqual(seen, sorted(Booking.objects.filter(user=self.user).values_list('id', flat=True), reverse=True))
+
+    def test_only_the_first_page_counts(self):
+        first = self.client.get('/api/bookings/').json()
+        self.assertEqual(first['count'], 25)
+        with self.assertNumQueries(1):
+            second = self.client.get(first['next']).json()
+        self.assertIsNone(second['count'])
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get('/api/bookings/').json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([b['id'] for b in back['results']], [b['id'] for b in first['results']])
+        self.assertIsNone(first['previous'])
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/bookings/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class BookingOverlapTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.existing = Booking.objects.create(
+            user=self.user, destination="Zanzibar", start_date=date(2026, 5, 10), end_date=date(2026, 5, 15)
+        )
+
+    def post(self, start, end, **extra):
+        return self.client.post('/api/bookings/', {
+            'destination': "Arusha", 'start_date': start, 'end_date': end, **extra
+        }, format='json')
+
+    def test_overlapping_dates_are_refused(self):
+        response = self.post('2026-05-14', '2026-05-20')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(self.existing.pk), json.dumps(response.json()))
+
+    def test_shared_end_day_overlaps(self):
+        self.assertEqual(self.post('2026-05-15', '2026-05-18').status_code, 400)
+
+    def test_adjacent_trip_is_allowed(self):
+        self.assertEqual(self.post('2026-05-16', '2026-05-18').status_code, 201)
+
+    def test_cancelled_bookings_do_not_block(self):
+        self.existing.status = 'cancelled'
+        self.existing.save()
+        self.assertEqual(self.post('2026-05-12', '2026-05-13').status_code, 201)
+
+    def test_long_trip_started_before_is_found(self):
+        Booking.objects.create(
+            user=self.user, destination="Overland", start_date=date(2025, 7, 1), end_date=date(2026, 6, 30)
+        )
+        self.assertEqual(self.post('2026-06-20', '2026-06-22').status_code, 400)
+
+    def test_other_users_bookings_do_not_block(self):
+        Booking.objects.create(
+            user=make_user(1), destination="Zanzibar", start_date=date(2026, 7, 1), end_date=date(2026, 7, 9)
+        )
+        self.assertEqual(self.post('2026-07-02', '2026-07-03').status_code, 201)
+
+    def test_trips_longer_than_the_cap_are_refused(self):
+        response = self.post('2027-01-01', '2028-01-02')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_date', response.json())
+
+    def test_batch_reports_overlaps_per_item_and_creates_nothing(self):
+        response = self.client.post('/api/bookings/batch/', [
+            {'destination': "A", 'start_date': '2026-08-01', 'end_date': '2026-08-05'},
+            {'destination': "B", 'start_date': '2026-08-04', 'end_date': '2026-08-06'},
+            {'destination': "C", 'start_date': '2026-09-01', 'end_date': '2026-09-02'},
+            {'destination': "D", 'start_date': '2026-05-11', 'end_date': '2026-05-11'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertTrue(errors[0] and errors[1] and errors[3])
+        self.assertEqual(errors[2], {})
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 1)
+
+
+class RangeTooLargeTests(unittest.TestCase):
+    def test_provider_range_errors_match(self):
+        for message in [
+            "query returned more than 10000 results",
+            "Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range",
+            "eth_getLogs is limited to a 10,000 range",
+            "block range is too wide",
+            "exceed maximum block range: 5000",
+        ]:
+            with self.subTest(message=message):
+                self.assertTrue(_range_too_large(ValueError(message)))
+
+    def test_rate_limits_and_timeouts_do_not_match(self):
+        for error in [
+            RateLimited("https://rpc.example returned HTTP 429"),
+            RateLimited("https://rpc.example is rate limiting: daily request count exceeded, request rate limited"),
+            ValueError("Your app has exceeded its compute units per second capacity"),
+            ValueError("request timed out, limit reached"),
+        ]:
+            with self.subTest(error=error):
+                self.assertFalse(_range_too_large(error))
+
+
+@unittest.skipUnless(importlib.util.find_spec("eth_tester"), "needs eth-tester[py-evm]")
+class OwnershipIndexerTests(TestCase):
+    def setUp(self):
+        from web3 import EthereumTesterProvider, Web3
+
+        self.w3 = Web3(EthereumTesterProvider())
+        self.deployer = self.w3.eth.accounts[0]
+        with open(BENCH_FIXTURE) as fixture_file:
+            fixture = json.load(fixture_file)
+        receipt = self.w3.eth.wait_for_transaction_receipt(
+            self.w3.eth.contract(abi=fixture["abi"], bytecode=fixture["bytecode"]).constructor().transact(
+                {'from': self.deployer}
+            )
+        )
+        self.contract = self.w3.eth.contract(address=receipt.contractAddress, abi=fixture["abi"])
+        self.wallets = self.w3.eth.accounts[1:4]
+
+    def mint(self, wallet):
+        self.w3.eth.wait_for_transaction_receipt(
+            self.contract.functions.mint(wallet, "ipfs://stamp").transact({'from': self.deployer})
+        )
+
+    def indexer(self, **kwargs):
+        return OwnershipIndexer(self.w3, self.contract.address, **{'confirmations': 0, **kwargs})
+
+    def owner_of(self, wallet):
+        return owned_soulstamp(wallet, contract_address=self.contract.address)
+
+    def test_indexes_minted_tokens_and_advances_the_cursor(self):
+        for wallet in self.wallets:
+            self.mint(wallet)
+        indexer = self.indexer(batch_blocks=2)
+        blocks, transfers = indexer.run_once()
+        self.assertEqual(transfers, 3)
+        self.assertEqual(indexer.cursor(), self.w3.eth.block_number)
+        for wallet in self.wallets:
+            self.assertIsNotNone(self.owner_of(wallet))
+        self.assertEqual(indexer.run_once(), (0, 0))
+
+    def test_shallow_blocks_wait_for_confirmations(self):
+        self.mint(self.wallets[0])
+        indexer = self.indexer(confirmations=2)
+        indexer.run_once()
+        self.assertIsNone(self.owner_of(self.wallets[0]))
+        for _ in range(2):
+            self.w3.eth.send_transaction({'from': self.deployer, 'to': self.deployer, 'value': 0})
+        indexer.run_once()
+        self.assertIsNotNone(self.owner_of(self.wallets[0]))
+
+    def test_range_too_large_is_split(self):
+        for wallet in self.wallets:
+            self.mint(wallet)
+        get_logs = self.w3.eth.get_logs
+
+        def capped(params):
+            if params['toBlock'] - params['fromBlock'] >= 2:
+                raise ValueError("query returned more than 10000 results")
+            return get_logs(params)
+
+        with mock.patch.object(self.w3.eth, 'get_logs', side_effect=capped):
+            _, transfers = self.indexer().run_once()
+        self.assertEqual(transfers, 3)
 
-# Create your tests here.
+    def test_rate_limit_is_raised_not_split(self):
+        self.mint(self.wallets[0])
+        indexer = self.indexer()
+        with mock.patch.object(self.w3.eth, 'get_logs', side_effect=RateLimited("returned HTTP 429")):
+            with self.assertRaises(RateLimited):
+                indexer.run_once()
+        self.assertEqual(indexer.cursor(), -1)
@@ -1,6 +1,6 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import BookingViewSet, mint_trailproof
+from .views import BookingExportView, BookingViewSet, booking_analytics, mint_job_status, mint_soulstamp_status, mint_trailproof
 
 router = DefaultRouter()
 router.register('', BookingViewSet, basename='bookings')
@@ -8,5 +8,9 @@ router.register('', BookingViewSet, basename='bookings')
 urlpatterns = [
     path('', include(router.urls)),
     path('mint/', mint_trailproof, name='mint-trailproof'),
+    path('mint/status/', mint_soulstamp_status, name='mint-soulstamp-status'),
+    path('mint/<int:job_id>/', mint_job_status, name='mint-job-status'),
+    path('analytics/', booking_analytics, name='booking-analytics'),
+    path('export/', BookingExportView.as_view(), name='booking-export'),
 
 ]
@@ -1,20 +1,35 @@
-from rest_framework import mixins, viewsets, permissions
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django.conf import settings
-from web3 import Web3
-import json
-import os
-import traceback
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.db.models import Sum
+from core.exports import StreamingExportView
 
-from .models import Booking
-from .serializers import BookingSerializer
+from .destinations import suggest_destinations
+from .exports import EXPORT_FIELDS, export_queryset
+from .jobs import IdempotencyKeyReused, WalletAlreadyMinting, enqueue_mint, find_mint_job, live_mint_for_wallet
+from .metadata import metadata_for_booking, metadata_uri
+from .ownership import indexed_through_block, owned_soulstamp
+from .models import Booking, BookingRollup, MintJob
+from .pagination import BookingCursorPagination
+from .serializers import (
+    BookingExportParamsSerializer,
+    BookingSerializer,
+    DateRangeSerializer,
+    MintJobSerializer,
+    MintRequestSerializer,
+    RollupQuerySerializer,
+)
 
 # Swagger
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiExample,
+    OpenApiParameter,
     OpenApiResponse,
     OpenApiTypes
 )
@@ -51,7 +66,8 @@ from drf_spectacular.utils import (
                         "start_date": "2025-07-10",
                         "end_date": "2025-07-15",
                         "status": "pending",
-                        "created_at": "2025-06-30T15:00:00Z"
+                        "created_at": "2025-06-30T15:00:00Z",
+                        "updated_at": "2025-06-30T15:00:00Z"
                     },
                     response_only=True
                 )
@@ -64,9 +80,10 @@ class BookingViewSet(mixins.CreateModelMixin,
                      viewsets.GenericViewSet):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = BookingCursorPagination
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user).order_by('-created_at')
+        return Booking.objects.filter(user=self.request.user).order_by('-created_at', '-id')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -80,41 +97,246 @@ class BookingViewSet(mixins.CreateModelMixin,
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
 
+    @extend_schema(
+        request=BookingSerializer(many=True),
+        responses={201: BookingSerializer(many=True)},
+        tags=["Booking"],
+        description=(
+            "Create several bookings in one request (up to BOOKING_BATCH_LIMIT). "
+            "Either every item is created or none is; errors are returned per item, in input order."
+        )
+    )
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.BOOKING_BATCH_LIMIT,
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            bookings = serializer.save(user=request.user)
+        return Response(BookingSerializer(bookings, many=True).data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='q', type=str, location=OpenApiParameter.QUERY, required=False,
+                             description="Destination prefix; empty returns the most booked destinations"),
+            OpenApiParameter(name='limit', type=int, location=OpenApiParameter.QUERY, required=False,
+                             description="Maximum suggestions (1-10, default 10)"),
+        ],
+        responses=OpenApiTypes.OBJECT,
+        tags=["Booking"],
+        description="Destination autocomplete ranked by number of bookings.",
+        examples=[
+            OpenApiExample(
+                name="DestinationSuggestions",
+                value=[{"destination": "Lagos", "bookings": 412}, {"destination": "Lamu", "bookings": 37}],
+                response_only=True
+            )
+        ]
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def destinations(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 10)
+        except ValueError:
+            limit = 10
+        suggestions = suggest_destinations(request.query_params.get('q', ''), limit)
+        return Response([{"destination": name, "bookings": count} for name, count in suggestions])
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='start', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=True),
+            OpenApiParameter(name='end', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=True),
+        ],
+        responses=BookingSerializer(many=True),
+        tags=["Booking"],
+        description="List the authenticated user's non-cancelled bookings that overlap [start, end] (inclusive)."
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def conflicts(self, request):
+        dates = DateRangeSerializer(data=request.query_params)
+        dates.is_valid(raise_exception=True)
+        bookings = (
+            self.get_queryset()
+            .active()
+            .overlapping(dates.validated_data['start'], dates.validated_data['end'])
+            .order_by('start_date', 'id')
+        )
+        return Response(BookingSerializer(bookings, many=True).data)
+
+
+# ----------------------------
+# Booking analytics (staff, served from BookingRollup)
+# ----------------------------
+@extend_schema(
+    parameters=[RollupQuerySerializer],
+    responses=OpenApiTypes.OBJECT,
+    tags=["Booking"],
+    description=(
+        "Booking counts grouped by destination, month or status. "
+        "Reads the incrementally maintained rollup table, so cost scales with the number of groups."
+    ),
+    examples=[
+        OpenApiExample(
+            name="ByMonth",
+            value=[{"month": "2025-06", "count": 120}, {"month": "2025-07", "count": 184}],
+            response_only=True
+        )
+    ]
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def booking_analytics(request):
+    query = RollupQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    group_by = params['group_by']
+
+    rollups = BookingRollup.objects.all()
+    if 'start' in params:
+        rollups = rollups.filter(month__gte=params['start'])
+    if 'end' in params:
+        rollups = rollups.filter(month__lte=params['end'])
+    if 'status' in params:
+        rollups = rollups.filter(status=params['status'])
+    if 'destination' in params:
+        rollups = rollups.filter(destination=params['destination'])
+
+    groups = (
+        rollups.values(group_by)
+        .annotate(count=Sum('count'))
+        .filter(count__gt=0)
+        .order_by('month' if group_by == 'month' else '-count')
+    )
+    if group_by == 'month':
+        return Response([{"month": f"{g['month']:%Y-%m}", "count": g['count']} for g in groups])
+    return Response(list(groups))
+
+
+@extend_schema(
+    parameters=[BookingExportParamsSerializer],
+    responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR},
+    tags=["Booking"],
+    description=(
+        "Stream every booking matching the filters as NDJSON or CSV (Admin only). "
+        "Gzip-compressed on the fly when the client sends Accept-Encoding: gzip."
+    )
+)
+class BookingExportView(StreamingExportView):
+    params_serializer_class = BookingExportParamsSerializer
+    export_fields = EXPORT_FIELDS
+    filename = 'bookings'
+
+    def export_queryset(self, **params):
+        return export_queryset(**params)
+
 
 # ----------------------------
 # Mint TrailProof (SoulStamp NFT)
 # ----------------------------
+# Generic metadata for mints not tied to a booking
+DEFAULT_METADATA_URI = "https://amber-legal-guppy-153.mypinata.cloud/ipfs/bafkreicro6ti6ipw62bp6hv2tzqqwbcwjgjgk65jl3xijlqaty2naz24gu"
+
+
 @extend_schema(
     tags=["Minting"],
-    description="Authenticated user can mint a SoulStamp NFT to their wallet address. Requires a valid RPC connection, contract ABI, and funded signer.",
-    
-    request=None,
-
+    description=(
+        "Queue a SoulStamp NFT mint to the authenticated user's wallet. "
+        "Returns immediately with a job id; a mint worker signs and broadcasts the transaction. "
+        "Poll /api/bookings/mint/{job_id}/ for the transaction hash.\n\n"
+        "With a booking, the token's metadata describes that trip (destination, dates, wallet) and is "
+        "content-addressed on IPFS.\n\n"
+        "Retries are safe: send the same Idempotency-Key header, or the same booking, and the "
+        "original job is returned with 200 instead of a second mint being queued."
+    ),
+    parameters=[
+        OpenApiParameter(
+            name="Idempotency-Key",
+            location=OpenApiParameter.HEADER,
+            required=False,
+            type=str,
+            description="Client-chosen key (max 255 chars). Repeats return the job the first request created."
+        )
+    ],
+    request=MintRequestSerializer,
+    examples=[
+        OpenApiExample(
+            name="MintForBooking",
+            value={"booking": 12},
+            request_only=True
+        )
+    ],
     responses={
+        202: OpenApiResponse(
+            response=OpenApiTypes.OBJECT,
+            description="Returned when the mint has been queued.",
+            examples=[
+                OpenApiExample(
+                    name="MintQueuedResponse",
+                    value={
+                        "job_id": 42,
+                        "status": "queued",
+                        "tx_hash": "",
+                        "status_url": "https://api.example.org/api/bookings/mint/42/"
+                    },
+                    response_only=True
+                )
+            ]
+        ),
         200: OpenApiResponse(
             response=OpenApiTypes.OBJECT,
-            description="Returned when the minting transaction is successfully broadcasted.",
+            description="Returned for a retry: the job created by the original request, in its current state.",
             examples=[
                 OpenApiExample(
-                    name="MintSuccessResponse",
+                    name="MintReplayedResponse",
                     value={
-                        "status": "Mint successful",
-                        "tx_hash": "0xabc123..."
+                        "job_id": 42,
+                        "status": "submitted",
+                        "tx_hash": "0xabc123...",
+                        "status_url": "https://api.example.org/api/bookings/mint/42/"
                     },
                     response_only=True
                 )
             ]
         ),
-        500: OpenApiResponse(
+        409: OpenApiResponse(
             response=OpenApiTypes.OBJECT,
-            description="Returned when minting fails due to RPC errors, wallet issues, or contract problems.",
+            description=(
+                "Returned when the wallet already holds a SoulStamp, per the indexed chain state, or already "
+                "has a live mint job. The index trails the chain by the confirmation depth; the job check "
+                "covers mints made through this API in that window."
+            ),
             examples=[
                 OpenApiExample(
-                    name="MintErrorResponse",
+                    name="AlreadyMintedResponse",
                     value={
-                        "error": "Minting failed: RPC connection failed"
+                        "error": "This wallet already holds a SoulStamp",
+                        "token_id": "17"
                     },
                     response_only=True
+                ),
+                OpenApiExample(
+                    name="MintInProgressResponse",
+                    value={
+                        "error": "This wallet already has a SoulStamp mint",
+                        "job_id": 42,
+                        "status": "submitted"
+                    },
+                    response_only=True
+                )
+            ]
+        ),
+        422: OpenApiResponse(
+            response=OpenApiTypes.OBJECT,
+            description="Returned when an Idempotency-Key is reused with a different booking.",
+            examples=[
+                OpenApiExample(
+                    name="IdempotencyKeyReusedResponse",
+                    value={"error": "Idempotency-Key was already used for a different booking"},
+                    response_only=True
                 )
             ]
         )
@@ -123,50 +345,105 @@ class BookingViewSet(mixins.CreateModelMixin,
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mint_trailproof(request):
-    user_wallet = Web3.to_checksum_address(request.user.wallet_address)
+    serializer = MintRequestSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    booking = serializer.validated_data.get('booking')
+    idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+    if len(idempotency_key) > 255:
+        return Response({"error": "Idempotency-Key must be at most 255 characters"},
+                        status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # 1. Connect to RPC
-        w3 = Web3(Web3.HTTPProvider(settings.MINT_RPC_URL))
-        if not w3.is_connected():
-            return Response({"error": "RPC connection failed"}, status=500)
-
-        # 2. Load and extract ABI from Hardhat artifact
-        with open(settings.MINT_ABI_PATH) as abi_file:
-            artifact = json.load(abi_file)
-            abi = artifact["abi"]
-
-        # 3. Prepare contract and signer
-        contract = w3.eth.contract(
-            address=Web3.to_checksum_address(settings.MINT_CONTRACT_ADDRESS),
-            abi=abi
-        )
-        private_key = settings.MINT_PRIVATE_KEY
-        account = w3.eth.account.from_key(private_key)
-
-        # 4. Prepare the mint arguments
-        metadata_uri = "https://amber-legal-guppy-153.mypinata.cloud/ipfs/bafkreicro6ti6ipw62bp6hv2tzqqwbcwjgjgk65jl3xijlqaty2naz24gu"  # Booking metadata
+        # A retry must get its original job back even once the stamp is
+        # indexed, so look for it before the ownership check
+        job = find_mint_job(request.user, booking, idempotency_key)
+        if job is None:
+            # The contract is soulbound and reverts on a second mint; refuse it
+            # here from the local index instead of spending gas to find out.
+            owned = owned_soulstamp(request.user.wallet_address)
+            if owned is not None:
+                return Response({
+                    "error": "This wallet already holds a SoulStamp",
+                    "token_id": str(owned.token_id)
+                }, status=status.HTTP_409_CONFLICT)
+            live = live_mint_for_wallet(request.user.wallet_address)
+            if live is not None:
+                raise WalletAlreadyMinting(live)
+            if booking is not None:
+                # Per-booking metadata, content-addressed; the worker pins it before minting
+                metadata = metadata_for_booking(booking, request.user.wallet_address)
+                uri = metadata_uri(metadata.cid)
+            else:
+                metadata, uri = None, DEFAULT_METADATA_URI
+            job, created = enqueue_mint(request.user, uri, booking, idempotency_key, metadata=metadata)
+        else:
+            created = False
+    except IdempotencyKeyReused as e:
+        return Response({"error": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except WalletAlreadyMinting as e:
+        return Response({
+            "error": str(e),
+            "job_id": e.job.id,
+            "status": e.job.status
+        }, status=status.HTTP_409_CONFLICT)
 
-        # 5. Build the transaction
-        nonce = w3.eth.get_transaction_count(account.address)
-        txn = contract.functions.mint(user_wallet, metadata_uri).build_transaction({
-            'from': account.address,
-            'nonce': nonce,
-            'gas': 300000,
-            'gasPrice': w3.to_wei('25', 'gwei')
-        })
+    return Response({
+        "job_id": job.id,
+        "status": job.status,
+        "tx_hash": job.tx_hash,
+        "status_url": request.build_absolute_uri(reverse('mint-job-status', args=[job.id]))
+    }, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
 
-        # 6. Sign and send
-        # Sign and send transaction
-        signed_txn = w3.eth.account.sign_transaction(txn, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
 
+@extend_schema(
+    tags=["Minting"],
+    responses=MintJobSerializer,
+    description=(
+        "Status of one of the authenticated user's mint jobs: queued, running, unconfirmed (broadcast outcome "
+        "being checked), submitted (with tx_hash), minted (receipt confirmed) or failed (with error)."
+    )
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def mint_job_status(request, job_id):
+    job = get_object_or_404(MintJob, id=job_id, user=request.user)
+    return Response(MintJobSerializer(job).data)
 
-        return Response({
-            "status": "Mint successful",
-            "tx_hash": tx_hash.hex()
-        })
 
-    except Exception as e:
-        traceback.print_exc()
-        return Response({"error": f"Minting failed: {str(e)}"}, status=500)
+@extend_schema(
+    tags=["Minting"],
+    responses=OpenApiTypes.OBJECT,
+    description=(
+        "SoulStamp ownership for the authenticated user's wallet, served from the local Transfer-log index "
+        "(no RPC), plus their most recent mint job."
+    ),
+    examples=[
+        OpenApiExample(
+            name="SoulStampStatus",
+            value={
+                "wallet_address": "0x45517beefe934ca1041f9e05f799184a32a29a7a",
+                "has_soulstamp": True,
+                "token_id": "17",
+                "tx_hash": "0xabc123...",
+                "block_number": 5123456,
+                "indexed_through_block": 5123470,
+                "latest_job": {"id": 42, "status": "submitted", "tx_hash": "0xabc123..."}
+            },
+            response_only=True
+        )
+    ]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def mint_soulstamp_status(request):
+    owned = owned_soulstamp(request.user.wallet_address)
+    latest_job = request.user.mint_jobs.order_by('-created_at', '-id').first()
+    return Response({
+        "wallet_address": request.user.wallet_address,
+        "has_soulstamp": owned is not None,
+        "token_id": str(owned.token_id) if owned else None,
+        "tx_hash": owned.tx_hash if owned else None,
+        "block_number": owned.block_number if owned else None,
+        "indexed_through_block": indexed_through_block(),
+        "latest_job": MintJobSerializer(latest_job).data if latest_job else None
+    })
@@ -0,0 +1,36 @@
+"""
+Accessors for heavy third-party packages that most requests never touch.
+
+Importing ``web3`` pulls in aiohttp, eth_abi, pydantic and websockets, which
+is a large share of a worker's cold start. Views call these on first use
+instead of importing at module level, so the cost is paid once per process
+by the first request that needs it.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def web3():
+    """Returns the ``web3.Web3`` class."""
+    from web3 import Web3
+    return Web3
+
+
+@lru_cache(maxsize=None)
+def eth_account():
+    """Returns the ``eth_account.Account`` class."""
+    from eth_account import Account
+    return Account
+
+
+@lru_cache(maxsize=None)
+def encode_defunct():
+    from eth_account.messages import encode_defunct
+    return encode_defunct
+
+
+@lru_cache(maxsize=None)
+def requests_exceptions():
+    """Returns ``requests.exceptions`` (the transport under web3's HTTPProvider)."""
+    import requests.exceptions
+    return requests.exceptions
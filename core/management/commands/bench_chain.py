@@ -0,0 +1,296 @@
+import json
+import logging
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core import lazy
+
+FIXTURE_PATH = settings.BASE_DIR / "nomadlink_backend/contracts/soulstamp_bench.json"
+
+
+def _load_eth_tester():
+    try:
+        from web3 import EthereumTesterProvider
+        import eth_tester  # noqa: F401
+    except ImportError as e:
+        raise CommandError(
+            f"bench_chain needs an in-process EVM ({e}). It is pinned in requirements.txt: "
+            "pip install -r requirements.txt"
+        )
+    return _serialized(EthereumTesterProvider)
+
+
+def _serialized(provider_class):
+    """
+    ``provider_class`` taking one request at a time. eth-tester's chain is
+    not thread-safe: concurrent calls lose blocks (BlockNotFound) and
+    nonces. Only the EVM call is held; web3's middleware, formatting and
+    the callers' signing and database work still run concurrently.
+    """
+
+    class SerializedProvider(provider_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._evm_lock = threading.Lock()
+
+        def make_request(self, method, params):
+            with self._evm_lock:
+                return super().make_request(method, params)
+
+    return SerializedProvider
+
+
+def _rpc_counter(counts):
+    """Web3 middleware that counts each JSON-RPC method reaching the provider."""
+    from web3.middleware import Web3Middleware
+
+    lock = threading.Lock()
+
+    class RPCCounter(Web3Middleware):
+        def wrap_make_request(self, make_request):
+            def middleware(method, params):
+                with lock:
+                    counts[method] += 1
+                return make_request(method, params)
+            return middleware
+
+        def wrap_make_batch_request(self, make_batch_request):
+            def middleware(requests_info):
+                with lock:
+                    counts.update(method for method, _ in requests_info)
+                return make_batch_request(requests_info)
+            return middleware
+
+    return RPCCounter
+
+
+def _drive(operation, items, concurrency):
+    """
+    Runs ``operation(item, worker_index)`` for every item from ``concurrency``
+    threads. Returns (latencies in ms, errors, wall seconds).
+    """
+    items = iter(items)
+    take = threading.Lock()
+    latencies, errors = [], []
+
+    def worker(index):
+        try:
+            while True:
+                with take:
+                    item = next(items, None)
+                if item is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    operation(item, index)
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(max(1, concurrency))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks wallet sign-in and SoulStamp minting against an in-process EVM (eth-tester), "
+        "reporting p50/p95/p99 latency, throughput and JSON-RPC calls per operation. "
+        "Runs on a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signins', type=int, default=100)
+        parser.add_argument('--mints', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=settings.MINT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        EthereumTesterProvider = _load_eth_tester()
+        Web3 = lazy.web3()
+        Account = lazy.eth_account()
+
+        counts = Counter()
+        w3 = Web3(EthereumTesterProvider())
+        w3.middleware_onion.add(_rpc_counter(counts), name='bench_rpc_counter')
+
+        with open(FIXTURE_PATH) as fixture_file:
+            fixture = json.load(fixture_file)
+        deployer = w3.eth.accounts[0]
+        receipt = w3.eth.wait_for_transaction_receipt(
+            w3.eth.contract(abi=fixture["abi"], bytecode=fixture["bytecode"]).constructor().transact({'from': deployer})
+        )
+        contract_address = receipt.contractAddress
+        self.stdout.write(f"Deployed {fixture['contractName']} at {contract_address}")
+
+        if connection.vendor == 'sqlite' and options['concurrency'] > 1:
+            # No row locks and table-level write locks: nonce allocation and
+            # job claiming would race or fail, so measure them serially
+            self.stdout.write(self.style.WARNING("SQLite can't run these paths concurrently; using --concurrency 1"))
+            options['concurrency'] = 1
+
+        # eth-tester mines on receipt and has no mempool, so it rejects a nonce
+        # that arrives ahead of its predecessor where a real node would queue
+        # it. Each mint thread therefore signs with its own funded key.
+        signers = [Account.create() for _ in range(max(1, options['concurrency']))]
+        for signer in signers:
+            w3.eth.wait_for_transaction_receipt(
+                w3.eth.send_transaction({'from': deployer, 'to': signer.address, 'value': 10 ** 21})
+            )
+
+        setup_test_environment()
+        old_names = {
+            alias: connections[alias].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            for alias in connections
+        }
+        try:
+            with override_settings(
+                MINT_CONTRACT_ADDRESS=contract_address,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            ):
+                self._run(w3, counts, signers, contract_address, options)
+        finally:
+            for alias, old_name in old_names.items():
+                connections[alias].creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, w3, counts, signers, contract_address, options):
+        from bookings.jobs import claim_jobs, confirm_jobs, run_batch
+        from bookings.minting import MintClient
+        from eth_account.messages import encode_defunct
+
+        Account = lazy.eth_account()
+        concurrency = options['concurrency']
+        wallets = [Account.create() for _ in range(max(options['signins'], options['mints']))]
+
+        # Sign-in: nonce request plus signature verification, both RPC-free
+        tokens = {}
+
+        def sign_in(wallet, worker=0):
+            # A Client per call: the test client keeps cookies and isn't thread-safe
+            client = Client()
+            nonce = client.get('/api/auth/nonce/', {'wallet': wallet.address}).json()
+            signed = Account.sign_message(encode_defunct(text=nonce['message']), private_key=wallet.key)
+            response = client.post('/api/auth/wallet-signin/', {
+                'wallet_address': wallet.address,
+                'signed_message': signed.signature.hex(),
+                'original_message': nonce['message'],
+            }, content_type='application/json')
+            if response.status_code != 200:
+                raise CommandError(f"wallet-signin returned {response.status_code}: {response.content[:200]}")
+            tokens[wallet.address] = response.json()['access']
+
+        # The first sign-in starts the signature process pool; keep that out of the numbers
+        sign_in(Account.create())
+        counts.clear()
+        self._report("wallet sign-in", counts, *_drive(sign_in, wallets[:options['signins']], concurrency))
+
+        # Mint request: the API only validates and queues a MintJob
+        mint_wallets = wallets[:options['mints']]
+        for wallet in mint_wallets:
+            if wallet.address not in tokens:
+                sign_in(wallet)
+
+        def request_mint(wallet, worker):
+            response = Client().post('/api/bookings/mint/', HTTP_AUTHORIZATION=f"Bearer {tokens[wallet.address]}")
+            if response.status_code != 202:
+                raise CommandError(f"mint returned {response.status_code}: {response.content[:200]}")
+
+        self._report("mint request (API)", counts, *_drive(request_mint, mint_wallets, concurrency))
+
+        # Mint worker: the queued jobs are broadcast in batches by the real MintClient
+        mint_clients = [
+            MintClient(
+                contract_address=contract_address,
+                private_key=signer.key,
+                abi_path=FIXTURE_PATH,
+                w3=w3,
+                gas_oracle_ttl=settings.MINT_GAS_ORACLE_TTL,
+                gas_margin=settings.MINT_GAS_MARGIN,
+            )
+            for signer in signers
+        ]
+        # Chain id and fee history are fetched once, then served from cache
+        for mint_client in mint_clients:
+            mint_client.ensure_healthy()
+            mint_client.gas.fees()
+        counts.clear()
+
+        batch_size = max(1, options['batch_size'])
+        batches = []
+        while True:
+            jobs = claim_jobs(batch_size)
+            if not jobs:
+                break
+            batches.append(jobs)
+        minted = []
+
+        def mint_batch(jobs, worker):
+            minted.append(run_batch(mint_clients[worker], jobs, max_attempts=1)[0])
+
+        latencies, errors, wall = _drive(mint_batch, batches, concurrency)
+        self._report(
+            f"mint worker (batches of {batch_size})", counts, latencies, errors, wall,
+            operations=sum(minted), unit="mint",
+        )
+        # Submitted is not minted: check every receipt, outside the timings
+        confirmed, reverted = confirm_jobs(mint_clients[0], confirmations=0)
+        counts.clear()
+        self.stdout.write(f"{'':<30} receipts: {confirmed} minted, {reverted} failed")
+
+        # Direct mint: one MintClient.mint per operation, no queue. The
+        # fixture reverts a second mint to a wallet, so use fresh ones.
+        def mint_direct(wallet, worker):
+            mint_clients[worker].mint(wallet.address, "ipfs://bench")
+
+        direct_wallets = [Account.create() for _ in range(options['mints'])]
+        self._report("mint (direct)", counts, *_drive(mint_direct, direct_wallets, concurrency))
+
+        # A wallet that already holds a stamp: the API refuses it without a transaction
+        def request_duplicate(wallet, worker):
+            response = Client().post('/api/bookings/mint/', HTTP_AUTHORIZATION=f"Bearer {tokens[wallet.address]}")
+            if response.status_code != 409:
+                raise CommandError(f"duplicate mint returned {response.status_code}: {response.content[:200]}")
+
+        # The 409s are expected; keep django.request from logging each one
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            self._report("duplicate mint (API)", counts, *_drive(request_duplicate, mint_wallets, concurrency))
+        finally:
+            request_logger.setLevel(level)
+
+    def _report(self, label, counts, latencies, errors, wall, operations=None, unit="op"):
+        operations = len(latencies) if operations is None else operations
+        calls = sum(counts.values())
+        breakdown = ", ".join(f"{method} {count}" for method, count in counts.most_common(4))
+        counts.clear()
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            percentiles = f"p50 {cuts[49]:7.1f}  p95 {cuts[94]:7.1f}  p99 {cuts[98]:7.1f} ms"
+        else:
+            percentiles = f"{latencies[0]:7.1f} ms" if latencies else "no samples"
+        self.stdout.write(
+            f"{label:<30} {percentiles}  {operations / wall if wall else 0:8.1f} {unit}/s  "
+            f"{calls / operations if operations else 0:5.2f} RPC/{unit}  errors {len(errors)}"
+        )
+        if breakdown:
+            self.stdout.write(f"{'':<30} {breakdown}")
+        for error in errors[:3]:
+            self.stdout.write(self.style.WARNING(f"{'':<30} {error}"))
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import AsyncClient, Client, override_settings
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+
+@csrf_exempt
+def _ok(request):
+    return JsonResponse({"ok": True})
+
+
+# Used as ROOT_URLCONF while benchmarking so only middleware cost differs
+urlpatterns = [
+    path('api/bench/', _ok),
+    path('bench/', _ok),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures per-request middleware overhead for /api/ with the fast path vs. the full stack, "
+        "through both the WSGI and the ASGI handler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        fast_path = 'core.middleware.APIFastPathMiddleware'
+        full_stack = [m for m in settings.MIDDLEWARE if m != fast_path] + list(settings.SITE_MIDDLEWARE)
+
+        runs = [
+            ("/api/ fast path", settings.MIDDLEWARE, '/api/bench/'),
+            ("/api/ full stack", full_stack, '/api/bench/'),
+            ("site page", settings.MIDDLEWARE, '/bench/'),
+        ]
+        for mode in ("wsgi", "asgi"):
+            results = {}
+            for label, middleware, url in runs:
+                with override_settings(
+                    ROOT_URLCONF=__name__,
+                    MIDDLEWARE=middleware,
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                ):
+                    if mode == "wsgi":
+                        results[label] = self._time_wsgi(url, count)
+                    else:
+                        results[label] = asyncio.run(self._time_asgi(url, count))
+                self.stdout.write(f"{mode} {label:<18} {results[label]:8.1f} us/request")
+
+            saved = results["/api/ full stack"] - results["/api/ fast path"]
+            self.stdout.write(self.style.SUCCESS(
+                f"{mode}: fast path saves {saved:.1f} us/request ({saved / results['/api/ full stack']:.0%}) on /api/"
+            ))
+
+    def _time_wsgi(self, url, count):
+        client = Client()
+        for _ in range(200):
+            client.post(url)
+        start = time.perf_counter()
+        for _ in range(count):
+            client.post(url)
+        return (time.perf_counter() - start) / count * 1e6
+
+    async def _time_asgi(self, url, count):
+        client = AsyncClient()
+        for _ in range(200):
+            await client.post(url)
+        start = time.perf_counter()
+        for _ in range(count):
+            await client.post(url)
+        return (time.perf_counter() - start) / count * 1e6
@@ -0,0 +1,121 @@
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from core import lazy
+from core.rpc import RPCPool
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # server.profile is (base_seconds, spike_seconds, spike_rate, error_rate)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        base, spike, spike_rate, error_rate = self.server.profile
+        rng = self.server.rng
+        time.sleep(spike if rng.random() < spike_rate else base)
+        if rng.random() < error_rate:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        def answer(request):
+            return {"jsonrpc": "2.0", "id": request["id"], "result": "0x10"}
+
+        payload = json.dumps([answer(r) for r in body] if isinstance(body, list) else answer(body)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub(profile, seed):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    server.daemon_threads = True
+    server.profile = profile
+    server.rng = random.Random(seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _dead_url():
+    # A port nothing listens on: connections are refused immediately
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks eth_blockNumber through core.rpc.RPCPool against local stub JSON-RPC servers "
+        "that inject latency spikes, 503s and a dead endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--hedge-after-ms', type=int, default=40)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        ms = 1 / 1000
+        profiles = {
+            # base latency, spike latency, spike rate, 503 rate
+            "spiky": (5 * ms, 250 * ms, 0.08, 0.0),
+            "steady": (15 * ms, 15 * ms, 0.0, 0.0),
+            "flaky": (3 * ms, 3 * ms, 0.0, 0.25),
+        }
+        servers, urls = [], {}
+        for index, (name, profile) in enumerate(profiles.items()):
+            server, url = _start_stub(profile, options['seed'] + index)
+            servers.append(server)
+            urls[name] = url
+        urls["dead"] = _dead_url()
+        names = {url: name for name, url in urls.items()}
+        hedge_after = options['hedge_after_ms'] * ms
+
+        runs = [
+            ("single endpoint (spiky)", [urls["spiky"]], 0),
+            ("pool, failover only", list(urls.values()), 0),
+            ("pool, failover + hedging", list(urls.values()), hedge_after),
+        ]
+        try:
+            for label, run_urls, hedge in runs:
+                self._run(label, run_urls, hedge, options['requests'], names)
+        finally:
+            for server in servers:
+                server.shutdown()
+
+    def _run(self, label, urls, hedge_after, count, names):
+        Web3 = lazy.web3()
+        provider = RPCPool(urls, timeout=2, pool_size=4, hedge_after=hedge_after, cooldown=1)
+        w3 = Web3(provider)
+        latencies, errors = [], 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                w3.eth.block_number
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{label:<26} p50 {cuts[49]:6.1f}  p95 {cuts[94]:6.1f}  p99 {cuts[98]:6.1f}  "
+            f"max {max(latencies):6.1f} ms  errors {errors}/{count}"
+        )
+        share = ", ".join(
+            f"{names[endpoint.url]} {endpoint.requests} ({endpoint.latency * 1000:.0f}ms, err {endpoint.error_rate:.2f})"
+            for endpoint in provider.endpoints
+        )
+        self.stdout.write(f"{'':<26} {share}")
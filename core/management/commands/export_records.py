@@ -0,0 +1,66 @@
+import sys
+import time
+from datetime import date
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORT_CONTENT_TYPES, export_stream, gzip_stream
+
+SOURCES = {
+    'bookings': 'bookings.exports',
+    'emergency': 'emergency.exports',
+}
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "Streams bookings or emergency alerts as NDJSON or CSV to a file or stdout, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=list(SOURCES))
+        parser.add_argument('--output', choices=list(EXPORT_CONTENT_TYPES), default='ndjson')
+        parser.add_argument('--file', '-o', default='-', help="Destination path, or - for stdout")
+        parser.add_argument('--gzip', action='store_true', help="Gzip the stream")
+        parser.add_argument('--since', help="YYYY-MM-DD, inclusive")
+        parser.add_argument('--until', help="YYYY-MM-DD, inclusive")
+        parser.add_argument('--status', help="Booking status filter")
+        parser.add_argument('--resolved', choices=['yes', 'no'], help="Emergency alert resolution filter")
+        parser.add_argument('--alert-type', help="Emergency alert type filter")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        exports = import_module(SOURCES[options['source']])
+        filters = {
+            'since': options['since'] and _date(options['since']),
+            'until': options['until'] and _date(options['until']),
+            'status': options['status'],
+            'resolved': None if options['resolved'] is None else options['resolved'] == 'yes',
+            'alert_type': options['alert_type'],
+        }
+        stream = export_stream(
+            exports.export_queryset(**filters), exports.EXPORT_FIELDS, options['output'], options['chunk_size']
+        )
+        if options['gzip']:
+            stream = gzip_stream(stream)
+
+        started = time.perf_counter()
+        written = 0
+        out = sys.stdout.buffer if options['file'] == '-' else open(options['file'], 'wb')
+        try:
+            for chunk in stream:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+
+        self.stderr.write(
+            f"Wrote {written} bytes to {options['file']} in {time.perf_counter() - started:.2f}s"
+        )
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'asgi': 'nomadlink_backend.asgi',
+    'wsgi': 'nomadlink_backend.wsgi',
+}
+
+
+class Command(BaseCommand):
+    help = "Lists the slowest imports when a worker loads the ASGI/WSGI application (python -X importtime)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=[*TARGETS, 'all'], default='all')
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+
+    def handle(self, *args, **options):
+        targets = TARGETS if options['target'] == 'all' else {options['target']: TARGETS[options['target']]}
+        for name, module in targets.items():
+            rows = self._profile(module)
+            total_ms = sum(row[0] for row in rows) / 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: import {module} ({total_ms:.0f} ms, {len(rows)} modules)"))
+            key = 1 if options['sort'] == 'cumulative' else 0
+            self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+            for self_us, cumulative_us, package in sorted(rows, key=lambda r: r[key], reverse=True)[:options['limit']]:
+                self.stdout.write(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {package}")
+            self.stdout.write("")
+
+    def _profile(self, module):
+        # A fresh interpreter, so modules already imported by manage.py do not hide their cost
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            fields = line[len('import time:'):].split('|')
+            try:
+                rows.append((int(fields[0]), int(fields[1]), fields[2].strip()))
+            except (IndexError, ValueError):
+                continue  # header row
+        return rows
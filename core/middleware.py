@@ -0,0 +1,128 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+
+class APIFastPathMiddleware:
+    """
+    Runs ``settings.SITE_MIDDLEWARE`` only for requests outside the API.
+
+    Session, CSRF, session-auth, messages and clickjacking middleware do
+    nothing useful for token-authenticated JSON, so paths under
+    ``API_FAST_PATH_PREFIXES`` go straight to the view. Everything else
+    (admin, template pages, ``API_FAST_PATH_EXCLUDE``) goes through the
+    nested chain, whose process_view/template_response/exception hooks are
+    forwarded in the order Django itself would call them.
+
+    Under ASGI it runs in async mode, so /api/ requests cross no extra
+    sync/async boundary here. The nested chain stays synchronous: in async
+    mode every MiddlewareMixin layer would hop to a thread on its own, so
+    site pages enter it once through ``sync_to_async``, as they did when
+    this middleware was sync-only.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django awaits these two hooks in async mode; the async versions
+            # spare /api/ requests a sync_to_async hop
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+        self.prefixes = tuple(settings.API_FAST_PATH_PREFIXES)
+        self.excluded = tuple(settings.API_FAST_PATH_EXCLUDE)
+
+        # Built and adapted the way BaseHandler.load_middleware builds the outer chain
+        adapt = BaseHandler().adapt_method_mode
+        handler = adapt(False, get_response, self.async_mode)
+        handler_is_async = False
+        self.site_middleware = []
+        for middleware_path in reversed(settings.SITE_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            can_sync = getattr(middleware, 'sync_capable', True)
+            can_async = getattr(middleware, 'async_capable', False)
+            if not can_sync and not can_async:
+                raise ImproperlyConfigured(
+                    f"Middleware {middleware_path} must have at least one of sync_capable/async_capable set to True."
+                )
+            if not handler_is_async and can_sync:
+                middleware_is_async = False
+            else:
+                middleware_is_async = can_async
+            try:
+                instance = middleware(adapt(middleware_is_async, handler, handler_is_async))
+            except MiddlewareNotUsed:
+                continue
+            self.site_middleware.insert(0, instance)
+            handler = convert_exception_to_response(instance)
+            handler_is_async = middleware_is_async
+        self.site_handler = adapt(self.async_mode, handler, handler_is_async)
+
+        self._view_hooks = [
+            adapt(False, m.process_view) for m in self.site_middleware if hasattr(m, 'process_view')
+        ]
+        self._template_response_hooks = [
+            adapt(False, m.process_template_response) for m in reversed(self.site_middleware)
+            if hasattr(m, 'process_template_response')
+        ]
+        self._exception_hooks = [
+            adapt(False, m.process_exception) for m in reversed(self.site_middleware)
+            if hasattr(m, 'process_exception')
+        ]
+
+    def is_api_request(self, request):
+        path = request.path_info
+        return path.startswith(self.prefixes) and not path.startswith(self.excluded)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.is_api_request(request):
+            return self.get_response(request)
+        return self.site_handler(request)
+
+    async def __acall__(self, request):
+        if self.is_api_request(request):
+            return await self.get_response(request)
+        return await self.site_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api_request(request):
+            return None
+        for hook in self._view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api_request(request):
+            return None
+        return await sync_to_async(type(self).process_view)(self, request, view_func, view_args, view_kwargs)
+
+    def process_template_response(self, request, response):
+        if not self.is_api_request(request):
+            for hook in self._template_response_hooks:
+                response = hook(request, response)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        if self.is_api_request(request):
+            return response
+        return await sync_to_async(type(self).process_template_response)(self, request, response)
+
+    def process_exception(self, request, exception):
+        if self.is_api_request(request):
+            return None
+        for hook in self._exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
@@ -0,0 +1,325 @@
+"""
+JSON-RPC provider that spreads calls across several Ethereum endpoints.
+
+Every endpoint keeps an exponentially weighted moving average (EWMA) of
+its latency and error rate. Reads go to the fastest healthy endpoint. A
+small share is sent elsewhere to keep the other averages current. If the
+chosen endpoint has not answered within ``hedge_after`` seconds, the same
+read goes to the next-best endpoint too, and the first good answer wins.
+A failed endpoint sits out a cooldown that doubles with each consecutive
+failure, and traffic fails over to the others meanwhile.
+
+Writes are never hedged. They move to another endpoint only when
+``never_sent`` shows the node never saw the request: the connection
+could not be opened, or the endpoint turned it away unprocessed.
+
+Endpoints can be at different heights, so reads that must agree, such as
+a head and then the logs up to it, go through ``pinned``: one endpoint,
+no hedging or failover.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+
+from django.conf import settings
+
+from core import lazy
+
+logger = logging.getLogger(__name__)
+
+
+# Methods that read chain state. Sending one twice is harmless, so they are
+# hedged and retried on any endpoint.
+IDEMPOTENT_METHODS = frozenset({
+    "eth_blockNumber",
+    "eth_call",
+    "eth_chainId",
+    "eth_estimateGas",
+    "eth_feeHistory",
+    "eth_gasPrice",
+    "eth_getBalance",
+    "eth_getBlockByHash",
+    "eth_getBlockByNumber",
+    "eth_getCode",
+    "eth_getLogs",
+    "eth_getStorageAt",
+    "eth_getTransactionByHash",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "eth_maxPriorityFeePerGas",
+    "eth_syncing",
+    "net_version",
+    "web3_clientVersion",
+})
+
+# JSON-RPC error codes that mean the node is overloaded rather than that
+# the request is wrong
+RETRYABLE_RPC_CODES = frozenset({-32005, 429})
+
+MAX_COOLDOWN = 60
+
+
+class EndpointError(ConnectionError):
+    """
+    An endpoint answered with an HTTP error or an overload response. It is
+    an ``OSError``, so callers treat it as a transport failure.
+    """
+
+
+class RateLimited(EndpointError):
+    """The endpoint turned the request away unprocessed (HTTP 429 or -32005)."""
+
+
+class Endpoint:
+    """One JSON-RPC URL with its own keep-alive session and health stats."""
+
+    def __init__(self, url, pool_size, alpha):
+        import requests
+
+        self.url = url
+        self.alpha = alpha
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def score(self):
+        # Unmeasured endpoints score 0 so they are tried, and measured, first
+        return self.latency * (1 + 4 * self.error_rate)
+
+    def available(self, now):
+        return now >= self.down_until
+
+    def record(self, elapsed, ok, cooldown):
+        with self._lock:
+            self.requests += 1
+            weight = self.alpha if self.requests > 1 else 1.0
+            self.latency += weight * (elapsed - self.latency)
+            self.error_rate += weight * ((0.0 if ok else 1.0) - self.error_rate)
+            if ok:
+                self.failures = 0
+                self.down_until = 0.0
+            else:
+                self.failures += 1
+                self.down_until = time.monotonic() + min(MAX_COOLDOWN, cooldown * 2 ** (self.failures - 1))
+
+    def __repr__(self):
+        return f"<Endpoint {self.url} {self.latency * 1000:.0f}ms err={self.error_rate:.2f}>"
+
+
+def RPCPool(urls, **kwargs):
+    """Builds the pool provider. The class is defined on first use so importing this module doesn't load web3."""
+    return _pool_class()(urls, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _pool_class():
+    from web3.providers.base import JSONBaseProvider
+
+    class _RPCPool(JSONBaseProvider):
+        """
+        ``JSONBaseProvider`` over several endpoints. See the module docstring
+        for the routing, hedging and failover rules.
+        """
+
+        def __init__(self, urls, timeout=15, pool_size=10, hedge_after=0.3, cooldown=5, alpha=0.2, explore=0.05):
+            super().__init__()
+            if isinstance(urls, str):
+                urls = [urls]
+            if not urls:
+                raise ValueError("RPCPool needs at least one endpoint")
+            self.endpoints = [Endpoint(url, pool_size, alpha) for url in urls]
+            self.timeout = timeout
+            self.hedge_after = hedge_after
+            self.cooldown = cooldown
+            self.explore = explore
+            # Room for one primary and one hedge per pooled connection
+            self._executor = ThreadPoolExecutor(max_workers=2 * pool_size, thread_name_prefix="rpc-pool")
+            self._pin = threading.local()
+
+        def __str__(self):
+            return f"RPC pool {', '.join(endpoint.url for endpoint in self.endpoints)}"
+
+        def ranked(self):
+            """Endpoints best first. Healthy ones by score, then those cooling down, soonest back first."""
+            now = time.monotonic()
+            healthy = sorted((e for e in self.endpoints if e.available(now)), key=Endpoint.score)
+            cooling = sorted((e for e in self.endpoints if not e.available(now)), key=lambda e: e.down_until)
+            if len(healthy) > 1 and random.random() < self.explore:
+                # Now and then lead with another healthy endpoint, so one slow
+                # sample doesn't keep it out of rotation for good
+                index = random.randrange(1, len(healthy))
+                healthy[0], healthy[index] = healthy[index], healthy[0]
+            return healthy + cooling
+
+        @contextmanager
+        def pinned(self):
+            """
+            Sends every call this thread makes inside the block to one
+            endpoint, the best at entry. If it fails, the error propagates
+            instead of moving to a node that may be at another height.
+            """
+            if getattr(self._pin, "endpoint", None) is not None:
+                yield self._pin.endpoint
+                return
+            self._pin.endpoint = self.ranked()[0]
+            try:
+                yield self._pin.endpoint
+            finally:
+                self._pin.endpoint = None
+
+        def make_request(self, method, params):
+            request_data = self.encode_rpc_request(method, params)
+            endpoint = getattr(self._pin, "endpoint", None)
+            if endpoint is not None:
+                return self.decode_rpc_response(self._post(endpoint, request_data))
+            if method in IDEMPOTENT_METHODS:
+                return self.decode_rpc_response(self._read(request_data))
+            return self.decode_rpc_response(self._write(request_data))
+
+        def make_batch_request(self, batch_requests):
+            from web3._utils.batching import sort_batch_response_by_response_ids
+
+            request_data = self.encode_batch_rpc_request(batch_requests)
+            endpoint = getattr(self._pin, "endpoint", None)
+            if endpoint is not None:
+                raw_response = self._post(endpoint, request_data)
+            elif all(method in IDEMPOTENT_METHODS for method, _ in batch_requests):
+                raw_response = self._read(request_data)
+            else:
+                raw_response = self._write(request_data)
+            response = self.decode_rpc_response(raw_response)
+            if not isinstance(response, list):
+                return response
+            return sort_batch_response_by_response_ids(response)
+
+        def _post(self, endpoint, request_data):
+            start = time.perf_counter()
+            try:
+                response = endpoint.session.post(
+                    endpoint.url,
+                    data=request_data,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.timeout,
+                )
+                if response.status_code == 429:
+                    raise RateLimited(f"{endpoint.url} returned HTTP 429")
+                if response.status_code >= 500:
+                    raise EndpointError(f"{endpoint.url} returned HTTP {response.status_code}")
+                response.raise_for_status()
+                body = response.content
+                overload = _overloaded(body)
+                if overload is not None:
+                    raise RateLimited(f"{endpoint.url} is rate limiting: {overload}")
+            except Exception:
+                endpoint.record(time.perf_counter() - start, False, self.cooldown)
+                raise
+            endpoint.record(time.perf_counter() - start, True, self.cooldown)
+            return body
+
+        def _read(self, request_data):
+            candidates = self.ranked()
+            if len(candidates) == 1:
+                return self._post(candidates[0], request_data)
+            errors = []
+            pending = {self._executor.submit(self._post, candidates[0], request_data)}
+            next_index = 1
+            while True:
+                # Wait for the first answer. Once the hedge delay passes, add
+                # the next-best endpoint so one slow node cannot hold the read.
+                hedge = self.hedge_after if self.hedge_after and next_index < len(candidates) else None
+                done, pending = wait(pending, timeout=hedge, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        errors.append(e)
+                if next_index < len(candidates) and (not done or not pending):
+                    if not done:
+                        logger.debug("Hedging read to %s", candidates[next_index].url)
+                    pending.add(self._executor.submit(self._post, candidates[next_index], request_data))
+                    next_index += 1
+                elif not pending:
+                    raise errors[-1]
+
+        def _write(self, request_data):
+            last_error = None
+            for endpoint in self.ranked():
+                try:
+                    return self._post(endpoint, request_data)
+                except Exception as e:
+                    if not never_sent(e):
+                        raise
+                    last_error = e
+                    logger.warning("RPC write failed over from %s: %s", endpoint.url, e)
+            raise last_error
+
+    return _RPCPool
+
+
+def pinned(w3):
+    """
+    ``w3.provider.pinned()`` for an ``RPCPool``; a no-op for any other
+    provider, which has a single endpoint anyway.
+    """
+    pin = getattr(w3.provider, "pinned", None)
+    return pin() if pin is not None else nullcontext()
+
+
+def never_sent(error):
+    """
+    True when ``error`` proves the request reached no node: the connection
+    was refused or timed out while opening, or the endpoint turned the
+    request away unprocessed. Any other transport failure, such as a read
+    timeout or a dropped connection, may come after the node acted on it.
+    """
+    if isinstance(error, RateLimited):
+        return True
+    exceptions = lazy.requests_exceptions()
+    if isinstance(error, exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, exceptions.ConnectionError):
+        from urllib3.exceptions import NewConnectionError
+
+        # requests wraps urllib3's MaxRetryError, whose reason is the real failure
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def _overloaded(body):
+    # The node's message when the whole response is an overload error, else
+    # None. Only a whole-response error counts. Items of a batch may have
+    # been accepted even when others were throttled, so a batch is never resent.
+    if not body.lstrip().startswith(b"{") or b'"error"' not in body:
+        return None
+    try:
+        error = json.loads(body).get("error")
+    except ValueError:
+        return None
+    if isinstance(error, dict) and error.get("code") in RETRYABLE_RPC_CODES:
+        return str(error.get("message", ""))
+    return None
+
+
+def pooled_web3(urls=None, pool_size=None, timeout=15):
+    """A ``Web3`` over an ``RPCPool`` of ``urls`` (default ``settings.RPC_ENDPOINTS``)."""
+    Web3 = lazy.web3()
+    return Web3(RPCPool(
+        urls if urls is not None else settings.RPC_ENDPOINTS,
+        timeout=timeout,
+        pool_size=pool_size or settings.MINT_RPC_POOL_SIZE,
+        hedge_after=settings.RPC_HEDGE_AFTER_MS / 1000,
+        cooldown=settings.RPC_FAILURE_COOLDOWN,
+    ))
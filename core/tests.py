@@ -1,3 +1,39 @@
-from django.test import TestCase
+import unittest
 
-# Create your tests here.
+from core import lazy
+from core.management.commands.bench_rpc_pool import _start_stub
+from core.rpc import EndpointError, RPCPool
+
+
+class RPCPoolPinningTests(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+
+    def stub(self, base=0.001, error_rate=0.0):
+        server, url = _start_stub((base, base, 0.0, error_rate), seed=1)
+        self.servers.append(server)
+        return url
+
+    def test_pinned_reads_are_not_hedged(self):
+        pool = RPCPool([self.stub(base=0.05), self.stub()], hedge_after=0.005, explore=0)
+        w3 = lazy.web3()(pool)
+        with pool.pinned() as endpoint:
+            for _ in range(3):
+                w3.eth.block_number
+        self.assertEqual(endpoint.requests, 3)
+        self.assertEqual(sum(e.requests for e in pool.endpoints if e is not endpoint), 0)
+
+    def test_pinned_failure_does_not_fail_over(self):
+        pool = RPCPool([self.stub(error_rate=1.0), self.stub()], hedge_after=0, explore=0)
+        w3 = lazy.web3()(pool)
+        with pool.pinned() as endpoint:
+            with self.assertRaises(EndpointError):
+                w3.eth.block_number
+        self.assertEqual(endpoint.url, pool.endpoints[0].url)
+        self.assertEqual(pool.endpoints[1].requests, 0)
+        # Outside the block the pool fails over again
+        self.assertEqual(w3.eth.block_number, 16)
@@ -0,0 +1,17 @@
+from core.exports import date_range_lookups
+
+from .models import EmergencyAlert
+
+EXPORT_FIELDS = (
+    'id', 'user_id', 'user__wallet_address', 'alert_type', 'message',
+    'latitude', 'longitude', 'is_resolved', 'triggered_at',
+)
+
+
+def export_queryset(since=None, until=None, resolved=None, alert_type=None, **kwargs):
+    alerts = EmergencyAlert.objects.filter(**date_range_lookups('triggered_at', since, until))
+    if resolved is not None:
+        alerts = alerts.filter(is_resolved=resolved)
+    if alert_type:
+        alerts = alerts.filter(alert_type=alert_type)
+    return alerts.order_by('id')
@@ -1,8 +1,15 @@
 from rest_framework import serializers
+from core.exports import ExportParamsSerializer
 from .models import EmergencyAlert
 
 class EmergencyAlertSerializer(serializers.ModelSerializer):
     class Meta:
         model = EmergencyAlert
         fields = '__all__'
-        read_only_fields = ['user', 'triggered_at', 'is_resolved']
\ No newline at end of file
+        read_only_fields = ['user', 'triggered_at', 'is_resolved']
+
+
+class EmergencyExportParamsSerializer(ExportParamsSerializer):
+    # default=None keeps an absent ?resolved= from reading as False
+    resolved = serializers.BooleanField(required=False, allow_null=True, default=None)
+    alert_type = serializers.ChoiceField(choices=EmergencyAlert.ALERT_TYPE_CHOICES, required=False)
@@ -5,8 +5,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from core.exports import StreamingExportView
+from .exports import EXPORT_FIELDS, export_queryset
 from .models import EmergencyAlert
-from .serializers import EmergencyAlertSerializer
+from .serializers import EmergencyAlertSerializer, EmergencyExportParamsSerializer
 from drf_spectacular.utils import extend_schema, OpenApiTypes
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
@@ -157,6 +159,24 @@ def resolve_emergency(request, alert_id):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@extend_schema(
+    parameters=[EmergencyExportParamsSerializer],
+    responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR},
+    tags=["Emergency"],
+    description=(
+        "Stream every emergency alert matching the filters as NDJSON or CSV (Admin only). "
+        "Gzip-compressed on the fly when the client sends Accept-Encoding: gzip."
+    )
+)
+class EmergencyExportView(StreamingExportView):
+    params_serializer_class = EmergencyExportParamsSerializer
+    export_fields = EXPORT_FIELDS
+    filename = 'emergency-alerts'
+
+    def export_queryset(self, **params):
+        return export_queryset(**params)
+
+
 @staff_member_required
 def websocket_test_view(request):
     return render(request, 'emergency/ws_test.html')
\ No newline at end of file
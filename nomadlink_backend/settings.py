@@ -3,9 +3,6 @@ from dotenv import load_dotenv
 import os
 from pathlib import Path
 from datetime import timedelta
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 
 load_dotenv()
 
@@ -41,6 +38,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'channels',
 
+    'core',
     'accounts',
     'bookings',
     'kyc',
@@ -50,23 +48,39 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
+# EmailOrWalletBackend extends ModelBackend and already covers wallet logins,
+# so a failed attempt is not looked up a second time.
 AUTHENTICATION_BACKENDS = [
     'accounts.auth_backends.EmailOrWalletBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
+AUTH_UNKNOWN_IDENTIFIER_TTL = int(os.getenv('AUTH_UNKNOWN_IDENTIFIER_TTL', 60))  # seconds
 
 # MIDDLEWARE
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.APIFastPathMiddleware',
+]
+
+# Run by APIFastPathMiddleware for admin and template pages only; JWT/Basic
+# authenticated /api/ requests skip them.
+SITE_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+API_FAST_PATH_PREFIXES = ['/api/']
+API_FAST_PATH_EXCLUDE = [
+    '/api/emergency/test-ws/',  # staff_member_required template view
+]
+
+# The admin checks look for session/auth/messages middleware in MIDDLEWARE;
+# they live in SITE_MIDDLEWARE and still run for /admin/.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
 
 # TEMPLATES
 TEMPLATES = [
@@ -104,6 +118,18 @@ DATABASES = {
     )
 }
 
+# CACHE
+# Consumed wallet nonces and cached login misses must be seen by every
+# process, so outside DEBUG the cache lives in the database. Create its
+# table with `python manage.py createcachetable`.
+if not DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
 # PASSWORD VALIDATION
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -132,13 +158,14 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # DEFAULT PRIMARY KEY
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET'),
-    secure=True
-)
+# Cloudinary (the SDK reads this dict itself when kyc.models imports
+# CloudinaryField, so settings don't import cloudinary)
+CLOUDINARY = {
+    'cloud_name': os.getenv('CLOUDINARY_CLOUD_NAME'),
+    'api_key': os.getenv('CLOUDINARY_API_KEY'),
+    'api_secret': os.getenv('CLOUDINARY_API_SECRET'),
+    'secure': True,
+}
 
 # REST FRAMEWORK
 REST_FRAMEWORK = {
@@ -149,14 +176,32 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
+        'accounts.authentication.CachedBasicAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Max items per POST /api/bookings/batch/
+BOOKING_BATCH_LIMIT = int(os.getenv('BOOKING_BATCH_LIMIT', 50))
+
+# Seconds between rebuilds of the in-process destination autocomplete trie
+DESTINATION_INDEX_TTL = int(os.getenv('DESTINATION_INDEX_TTL', 300))
+# Destinations indexed, most booked first. Bounds the trie's memory: about
+# 37 MiB for 20000 random names in bench_destinations, less for real places
+DESTINATION_INDEX_MAX_ENTRIES = int(os.getenv('DESTINATION_INDEX_MAX_ENTRIES', 20000))
+# Destinations booked by fewer distinct users are never suggested
+DESTINATION_MIN_USERS = int(os.getenv('DESTINATION_MIN_USERS', 5))
+
+# Most recent bookings embedded in /api/auth/profile/
+PROFILE_BOOKINGS_LIMIT = int(os.getenv('PROFILE_BOOKINGS_LIMIT', 20))
+
+# Verified Basic credentials skip the password hasher for this long
+BASIC_AUTH_CACHE_TTL = int(os.getenv('BASIC_AUTH_CACHE_TTL', 300))  # seconds
+BASIC_AUTH_CACHE_SIZE = int(os.getenv('BASIC_AUTH_CACHE_SIZE', 1024))
+
 # DRF SPECTACULAR
 SPECTACULAR_SETTINGS = {
     'TITLE': 'XcelTrip API',
@@ -182,8 +227,22 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Re-reads the user's claims on refresh (see accounts.tokens.USER_CLAIMS)
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.UserTokenRefreshSerializer',
 }
 
+# WALLET SIGN-IN
+# 'stateless' issues HMAC-signed nonces and creates users only after a valid
+# signature, and needs a shared cache (accounts.E001); 'database' keeps the
+# legacy per-user nonce columns.
+WALLET_NONCE_MODE = os.getenv('WALLET_NONCE_MODE', 'stateless')
+WALLET_NONCE_TTL = int(os.getenv('WALLET_NONCE_TTL', 300))  # seconds
+# Signature recovery runs in a process pool; 0 workers recovers inline.
+# Every web process gets its own pool, so keep this small.
+WALLET_SIGNATURE_WORKERS = int(os.getenv('WALLET_SIGNATURE_WORKERS', 2))
+WALLET_SIGNATURE_BATCH_SIZE = int(os.getenv('WALLET_SIGNATURE_BATCH_SIZE', 32))
+WALLET_SIGNATURE_BATCH_WINDOW_MS = float(os.getenv('WALLET_SIGNATURE_BATCH_WINDOW_MS', 2))
+
 # CORS
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
@@ -231,6 +290,50 @@ LOGGING = {
 
 # MINTING CONFIG
 MINT_RPC_URL = os.getenv("MINT_RPC_URL")
+# Comma-separated JSON-RPC endpoints shared by minting and indexing; reads go
+# to the fastest healthy one. Defaults to MINT_RPC_URL alone.
+RPC_ENDPOINTS = [url.strip() for url in os.getenv("RPC_ENDPOINTS", MINT_RPC_URL or "").split(",") if url.strip()]
+# Send an idempotent read to a second endpoint if the first hasn't answered; 0 disables
+RPC_HEDGE_AFTER_MS = int(os.getenv("RPC_HEDGE_AFTER_MS", 300))
+# Seconds a failing endpoint is skipped; doubles per consecutive failure, up to 60
+RPC_FAILURE_COOLDOWN = int(os.getenv("RPC_FAILURE_COOLDOWN", 5))
 MINT_CONTRACT_ADDRESS = os.getenv("MINT_CONTRACT_ADDRESS")
 MINT_PRIVATE_KEY = os.getenv("MINT_WALLET_PRIVATE_KEY")
-MINT_ABI_PATH = BASE_DIR / "contracts/soulstamp_abi.json"
+MINT_ABI_PATH = os.getenv("MINT_ABI_PATH", str(BASE_DIR / "nomadlink_backend/contracts/soulstamp_abi.json"))
+# Seconds a successful RPC health probe (or send) is trusted before re-probing
+MINT_RPC_HEALTH_TTL = int(os.getenv("MINT_RPC_HEALTH_TTL", 30))
+# Keep-alive connections held open to each RPC endpoint per process
+MINT_RPC_POOL_SIZE = int(os.getenv("MINT_RPC_POOL_SIZE", 10))
+# Seconds between syncs of the shared signer nonce counter with the chain
+MINT_NONCE_RESYNC_INTERVAL = int(os.getenv("MINT_NONCE_RESYNC_INTERVAL", 300))
+# run_mint_worker: mints in flight per worker, and tries per job on RPC failures
+MINT_WORKER_CONCURRENCY = int(os.getenv("MINT_WORKER_CONCURRENCY", 4))
+MINT_JOB_MAX_ATTEMPTS = int(os.getenv("MINT_JOB_MAX_ATTEMPTS", 3))
+# Mint jobs sent together, and how long a worker waits to fill a batch
+MINT_BATCH_SIZE = int(os.getenv("MINT_BATCH_SIZE", 20))
+MINT_BATCH_WINDOW_MS = int(os.getenv("MINT_BATCH_WINDOW_MS", 250))
+# Seconds cached fee data is used before a background refresh
+MINT_GAS_ORACLE_TTL = int(os.getenv("MINT_GAS_ORACLE_TTL", 15))
+# Headroom added to memoized estimate_gas results
+MINT_GAS_MARGIN = float(os.getenv("MINT_GAS_MARGIN", 1.2))
+# Ceiling on maxFeePerGas / gasPrice in gwei; 0 disables the cap
+MINT_MAX_FEE_GWEI = float(os.getenv("MINT_MAX_FEE_GWEI", 0))
+# index_soulstamps: contract deployment block, eth_getLogs range size, and
+# how far behind head to stay so ingested blocks cannot be reorged out
+MINT_INDEX_START_BLOCK = int(os.getenv("MINT_INDEX_START_BLOCK", 0))
+MINT_INDEX_BATCH_BLOCKS = int(os.getenv("MINT_INDEX_BATCH_BLOCKS", 2000))
+MINT_INDEX_CONFIRMATIONS = int(os.getenv("MINT_INDEX_CONFIRMATIONS", 12))
+
+# SOULSTAMP METADATA
+# Per-booking token metadata is content-addressed and pinned by the mint
+# worker before minting. The local backend writes to METADATA_LOCAL_DIR and
+# is the default only with DEBUG; elsewhere set a real service, e.g.
+# bookings.metadata.PinataPinningBackend (system check bookings.E001).
+METADATA_PINNING_BACKEND = os.getenv(
+    "METADATA_PINNING_BACKEND", "bookings.metadata.LocalPinningBackend" if DEBUG else ""
+)
+METADATA_LOCAL_DIR = os.getenv("METADATA_LOCAL_DIR", os.path.join(MEDIA_ROOT, "metadata"))
+PINATA_JWT = os.getenv("PINATA_JWT")
+# Token URIs are this prefix plus the CID, e.g. a dedicated gateway's https://<name>.mypinata.cloud/ipfs/
+METADATA_BASE_URI = os.getenv("METADATA_BASE_URI", "ipfs://")
+MINT_METADATA_IMAGE_URI = os.getenv("MINT_METADATA_IMAGE_URI", "")